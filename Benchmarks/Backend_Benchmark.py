@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(root, "Data"))
+sys.path.insert(0, os.path.join(root, "Model"))
+from Rolling_Averages import build_testing_data, feature_columns
+from Storage import find_table, load_table
+from backends import default_params, make_model
+from model import id_columns, target
+
+def grow_training_set(X, y, size, seed=0):
+    """
+    The latest `size` training rows. Beyond the real history, rows are resampled with a little
+    noise to stand in for extra seasons (scaling only; they carry no new information).
+    """
+    if size <= len(X):
+        return X[-size:], y[-size:]
+    rng = np.random.default_rng(seed)
+    extra = rng.integers(0, len(X), size - len(X))
+    noise = rng.normal(0, 0.05, (len(extra), X.shape[1])) * X.std(axis=0)
+    return np.vstack([X, X[extra] + noise]), np.concatenate([y, y[extra]])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare regression backends as the training set grows.")
+    parser.add_argument("--data", default="rolling_averages.csv", help="rolling averages table")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000, 8000], help="training set sizes")
+    parser.add_argument("--backends", nargs="+", default=sorted(default_params), help="backends to compare")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of the latest games held out for MAE")
+    args = parser.parse_args()
+
+    df = load_table(find_table(args.data)).dropna().sort_values(by="Date", kind="stable").reset_index(drop=True)
+    X = df[feature_columns].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+
+    # Train on earlier games and score the most recent ones. Training rows are used as
+    # rolling_averages.csv stores them, but held-out games get the features that were known
+    # before tip-off (the same as-of lookup that builds testing.csv), as at prediction time.
+    split = int(len(df) * (1 - args.holdout))
+    X_train_all, y_train_all = X[:split], y[:split]
+    held_out = df.iloc[split:]
+    X_test = build_testing_data(df, held_out[id_columns])[feature_columns].to_numpy(dtype=np.float64)
+    y_test = held_out[target].to_numpy(dtype=np.float64)
+    known = ~np.isnan(X_test).any(axis=1)
+    X_test, y_test = X_test[known], y_test[known]
+    print(f"{len(X_train_all)} real training games, {len(X_test)} held-out games\n")
+
+    print(f"{'backend':>9} {'train rows':>11} {'fit (s)':>9} {'predict (ms/game)':>18} {'single (ms)':>12} {'MAE':>7}")
+    results = []
+    for size in args.sizes:
+        X_train, y_train = grow_training_set(X_train_all, y_train_all, size)
+        for backend in args.backends:
+            model = make_model(backend)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            y_pred = model.predict(X_test)
+            batch_ms = (time.perf_counter() - start) * 1000 / len(X_test)
+
+            start = time.perf_counter()
+            model.predict(X_test[:1])
+            single_ms = (time.perf_counter() - start) * 1000
+
+            mae = mean_absolute_error(y_test, y_pred)
+            results.append({"backend": backend, "train_rows": size, "fit_s": fit_time,
+                            "predict_ms_per_game": batch_ms, "single_ms": single_ms, "mae": mae})
+            print(f"{backend:>9} {size:>11} {fit_time:>9.2f} {batch_ms:>18.3f} {single_ms:>12.2f} {mae:>7.2f}")
+
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+
+from bs4 import BeautifulSoup
+
+from common import time_call
+import Table_Extract
+from Table_Extract import parse_rows, table_selector
+
+# What every scraper did per page before Table_Extract: serialize the whole body, build a
+# BeautifulSoup tree of it with html.parser and read the row cells with get_text()
+def legacy_scrape_table_data(body_html):
+    soup = BeautifulSoup(body_html, "html.parser")
+    rows = soup.select("tbody.Crom_body__UYOcU tr")
+    return [[td.get_text() for td in row.find_all("td")] for row in rows]
+
+def write_fixtures(directory, pages, rows_per_page=100, filler_kb=400, seed=0):
+    """
+    Stand-in for saved stats pages: a 100-row box score table inside a body padded with navigation,
+    inline scripts and markup the way nba.com's is. Saved real pages can be used with --fixtures.
+    """
+    rng = random.Random(seed)
+    filler_item = '<li class="nav-item"><a href="/stats/teams">Teams <span>stats</span></a></li>'
+    filler = "<nav><ul>" + filler_item * (filler_kb * 1024 // len(filler_item)) + "</ul></nav>"
+    for page in range(pages):
+        rows = "".join(
+            "<tr>" + f'<td><a href="/player/{i}">Player {page}-{i}</a></td><td>BOS</td><td>BOS vs. NYK</td>'
+            + "".join(f"<td>{rng.randint(0, 40)}</td>" for _ in range(23)) + "</tr>"
+            for i in range(rows_per_page)
+        )
+        html = (f"<body><header>{filler}</header><main><table><thead><tr><th>Player</th></tr></thead>"
+                f'<tbody class="Crom_body__UYOcU">{rows}</tbody></table></main>'
+                f"<script>window.__NEXT_DATA__ = {{}};</script></body>")
+        with open(os.path.join(directory, f"page_{page:03d}.html"), "w") as f:
+            f.write(html)
+
+def time_parser(parse, pages):
+    # Best pass over all the pages, in milliseconds per page
+    seconds, results = time_call(lambda: [parse(html) for html in pages])
+    return seconds * 1000 / len(pages), results
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-page table extraction cost: whole-body BeautifulSoup vs Table_Extract.")
+    parser.add_argument("--fixtures", help="directory of saved page HTML (*.html); generated if omitted")
+    parser.add_argument("--pages", type=int, default=20, help="pages to generate when --fixtures is omitted")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.fixtures
+        if directory is None:
+            directory = tmp
+            write_fixtures(directory, args.pages)
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+            with open(path) as f:
+                pages.append(f.read())
+
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KB each, lxml "
+          f"{'available' if Table_Extract.lxml is not None else 'not installed'}\n")
+    legacy_ms, expected = time_parser(legacy_scrape_table_data, pages)
+    expected = [[tuple(row) for row in rows] for rows in expected]
+
+    # Table_Extract on the same saved pages, and on the table body alone (roughly what the
+    # in-page evaluate leaves to do: it never ships the rest of the document to Python)
+    fragments = [f'<table><tbody class="Crom_body__UYOcU">{BeautifulSoup(html, "html.parser").select_one(table_selector).decode_contents()}</tbody></table>'
+                 for html in pages]
+    runs = [("legacy body + html.parser", legacy_ms, expected)]
+    runs.append(("parse_rows, whole page", *time_parser(parse_rows, pages)))
+    runs.append(("parse_rows, table only", *time_parser(parse_rows, fragments)))
+
+    print(f"{'extractor':>26} {'ms/page':>9} {'speedup':>8} {'rows identical':>15}")
+    all_match = True
+    for name, ms, results in runs:
+        match = results == expected
+        all_match &= match
+        print(f"{name:>26} {ms:>9.2f} {legacy_ms / ms:>7.1f}x {str(match):>15}")
+
+    if not all_match:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import time_call
+from Player_Rolling import (
+    game_sides, player_feature_columns, player_stats, player_team_features, update_player_features, write_player_features
+)
+from Rolling_Averages import windows
+from Synthetic_Box_Scores import generate_box_scores
+
+# The same features with pandas' groupby().rolling() per window, kept as the reference for timing and comparison
+def naive_player_team_features(df):
+    keys = game_sides(df)
+    groups = [keys["Date"], keys["Team_home"], keys["Team_away"], keys["is_away"]]
+    frames = []
+    for window in windows:
+        means = (df.groupby("Player")[["Minutes"] + player_stats]
+                 .rolling(window, min_periods=1).mean()
+                 .reset_index(level=0, drop=True).sort_index())
+        rates = means[player_stats].div(means["Minutes"], axis=0).where(means["Minutes"] > 0, 0.0)
+        weighted = rates.mul(df["Minutes"], axis=0)
+        weighted.insert(0, "Minutes", means["Minutes"] * df["Minutes"])
+        totals = weighted.groupby(groups).sum()
+        totals["Minutes"] /= df["Minutes"].groupby(groups).sum()
+        for side, is_away in (("home", False), ("away", True)):
+            frames.append(totals.xs(is_away, level="is_away").add_suffix(f"_{side}_pavg_{window}"))
+    features = pd.concat(frames, axis=1, join="inner").reset_index()
+    features = features[["Date", "Team_home", "Team_away"] + player_feature_columns]
+    return features.sort_values(by=["Date", "Team_home"], ascending=False).reset_index(drop=True)
+
+def time_daily_update(df):
+    """
+    Full build of every date but the last, then time adding the last date incrementally and
+    check it against the full build.
+    """
+    last_date = df["Date"].max()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "player_boxscores.csv")
+        output_file = os.path.join(tmp, "player_features.csv")
+        df[df["Date"] < last_date].to_csv(input_file, index=False)
+        write_player_features(input_file, output_file)
+        df.to_csv(input_file, index=False)
+        start = time.perf_counter()
+        new_rows = update_player_features(input_file, output_file)
+        elapsed = time.perf_counter() - start
+        incremental = pd.read_csv(output_file, float_precision="round_trip")
+    full = player_team_features(df)
+    same = np.array_equal(incremental[player_feature_columns].to_numpy(), full[player_feature_columns].to_numpy(), equal_nan=True)
+    return elapsed, len(new_rows), same
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the player rolling feature engine against groupby().rolling() on synthetic seasons.")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[1, 5, 10, 20], help="season counts to time")
+    parser.add_argument("--max-naive-seasons", type=int, default=5, help="skip the groupby().rolling() reference above this many seasons")
+    parser.add_argument("--seed", type=int, default=0, help="generator seed")
+    args = parser.parse_args()
+
+    print(f"{'seasons':>7} {'rows':>8} {'games':>6} {'naive (s)':>10} {'engine (s)':>11} {'speedup':>8} {'max diff':>9} {'daily update (s)':>17} {'update = full':>14}")
+    all_match = True
+    for seasons in args.seasons:
+        df = generate_box_scores(seasons, seed=args.seed)
+        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
+
+        engine_time, features = time_call(player_team_features, df)
+        naive_time, diff, speedup = None, None, ""
+        if seasons <= args.max_naive_seasons:
+            naive_time, naive = time_call(naive_player_team_features, df, repeat=1)
+            # pandas' running add/remove sums drift by a few ulps, so values are compared to a tolerance
+            diff = np.nanmax(np.abs(naive[player_feature_columns].to_numpy() - features[player_feature_columns].to_numpy()))
+            all_match &= bool(diff < 1e-6)
+            speedup = f"{naive_time / engine_time:.1f}x"
+        update_time, new_games, same = time_daily_update(df)
+        all_match &= same
+
+        print(f"{seasons:>7} {len(df):>8} {len(features):>6} "
+              f"{'-' if naive_time is None else f'{naive_time:.2f}':>10} {engine_time:>11.3f} {speedup:>8} "
+              f"{'-' if diff is None else f'{diff:.1e}':>9} {update_time:>17.3f} {str(same):>14}")
+
+    if not all_match:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
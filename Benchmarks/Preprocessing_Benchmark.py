@@ -0,0 +1,119 @@
+import argparse
+import io
+import os
+import sys
+
+import pandas as pd
+
+from common import time_call
+from Preprocessing import aggregate_game_stats, final_columns, stat_columns
+
+# Row-wise implementation that combine_game_stats used before the vectorized engine.
+# Kept here only as the reference for timing and output comparison.
+def legacy_aggregate_game_stats(df):
+    home_games = df[~df['Opponent'].str.contains('@')].copy()
+    away_games = df[df['Opponent'].str.contains('@')].copy()
+
+    def get_matchup_key(row):
+        if '@' in row['Opponent']:
+            away_team = row['Team']
+            home_team = row['Opponent'].split(' @ ')[1]
+        else:
+            home_team = row['Team']
+            away_team = row['Opponent'].split(' vs. ')[1]
+        return f"{home_team}_{away_team}_{row['Date']}"
+
+    home_games.loc[:, 'matchup_key'] = home_games.apply(get_matchup_key, axis=1)
+    away_games.loc[:, 'matchup_key'] = away_games.apply(get_matchup_key, axis=1)
+
+    def aggregate_team_stats(group):
+        stats = {col: group[col].sum() for col in stat_columns}
+        stats['Team'] = group['Team'].iloc[0]
+        stats['Date'] = group['Date'].iloc[0]
+        return pd.Series(stats)
+
+    # errors='ignore' because newer pandas no longer passes the grouping column to apply
+    home_stats = home_games.groupby('matchup_key').apply(lambda group: aggregate_team_stats(group.drop(columns=['matchup_key'], errors='ignore'))).reset_index()
+    away_stats = away_games.groupby('matchup_key').apply(lambda group: aggregate_team_stats(group.drop(columns=['matchup_key'], errors='ignore'))).reset_index()
+
+    for stats_df in [home_stats, away_stats]:
+        stats_df['FG%'] = (stats_df['FGM'] / stats_df['FGA']).fillna(0)
+        stats_df['3P%'] = (stats_df['3PM'] / stats_df['3PA']).fillna(0)
+        stats_df['FT%'] = (stats_df['FTM'] / stats_df['FTA']).fillna(0)
+
+    combined_stats = pd.merge(home_stats, away_stats, on='matchup_key', suffixes=('_home', '_away'))
+    combined_stats['Point_diff'] = combined_stats['Points_home'] - combined_stats['Points_away']
+
+    final_df = combined_stats[['Date_home'] + final_columns[1:]].rename(columns={'Date_home': 'Date'})
+    return final_df.sort_values(by=['Date', 'Team_home'], ascending=False)
+
+def explode_game_stats(game_stats, players_per_team=10, copies=1):
+    """
+    Rebuild player-level rows from game_stats.csv so that their team totals reproduce it exactly.
+    Each copy shifts the dates forward by a year to stand in for another season.
+    """
+    frames = []
+    for copy in range(copies):
+        dates = (pd.to_datetime(game_stats['Date']) + pd.DateOffset(years=copy)).dt.strftime("%Y-%m-%d")
+        for side, other, fmt in [('home', 'away', "{} vs. {}"), ('away', 'home', "{} @ {}")]:
+            team = game_stats[f'Team_{side}']
+            opponent = [fmt.format(a, b) for a, b in zip(team, game_stats[f'Team_{other}'])]
+            for player in range(players_per_team):
+                rows = pd.DataFrame({
+                    'Player': team + f" Player {player}",
+                    'Team': team,
+                    'Opponent': opponent,
+                    'Date': dates,
+                })
+                for col in stat_columns:
+                    total = game_stats[f'{col}_{side}'].to_numpy()
+                    # Give the first player the remainder so the sums stay exact
+                    share = total // players_per_team
+                    rows[col] = share + (total - share * players_per_team) * (player == 0)
+                frames.append(rows)
+    df = pd.concat(frames, ignore_index=True)
+    # Scraped box scores arrive sorted by date and opponent, not grouped by game
+    return df.sort_values(by=['Date', 'Opponent'], kind='stable').reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark combine_game_stats against the row-wise implementation.")
+    parser.add_argument("--players", default="player_boxscores.csv", help="player box score CSV (rebuilt from --games if missing)")
+    parser.add_argument("--games", default="game_stats.csv", help="reference game_stats.csv")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 5, 10], help="number of seasons-worth of copies to time")
+    parser.add_argument("--skip-legacy-above", type=int, default=5, help="skip the slow implementation above this many copies")
+    args = parser.parse_args()
+
+    game_stats = pd.read_csv(args.games)
+    with open(args.games) as f:
+        reference_csv = f.read()
+
+    # Correctness: the vectorized output must match game_stats.csv byte for byte
+    if os.path.exists(args.players):
+        players = pd.read_csv(args.players)
+        print(f"Loaded {len(players)} player rows from {args.players}")
+    else:
+        players = explode_game_stats(game_stats)
+        print(f"{args.players} not found; rebuilt {len(players)} player rows from {args.games}")
+
+    buffer = io.StringIO()
+    aggregate_game_stats(players).to_csv(buffer, index=False)
+    identical = buffer.getvalue() == reference_csv
+    print(f"Vectorized output identical to {args.games}: {identical}")
+
+    print(f"\n{'copies':>6} {'player rows':>12} {'games':>7} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8} {'match':>6}")
+    for copies in args.copies:
+        players = explode_game_stats(game_stats, copies=copies)
+        new_time, new_df = time_call(aggregate_game_stats, players)
+        if copies <= args.skip_legacy_above:
+            old_time, old_df = time_call(legacy_aggregate_game_stats, players, repeat=1)
+            match = old_df.reset_index(drop=True).astype(new_df.dtypes.to_dict()).equals(new_df.reset_index(drop=True))
+            old_str, speedup = f"{old_time:.3f}", f"{old_time / new_time:.1f}x"
+        else:
+            old_str, speedup, match = "-", "-", "-"
+        print(f"{copies:>6} {len(players):>12} {len(new_df):>7} {old_str:>11} {new_time:>15.3f} {speedup:>8} {str(match):>6}")
+
+    if not identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
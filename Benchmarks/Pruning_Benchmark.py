@@ -0,0 +1,56 @@
+import argparse
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+
+from common import time_call
+from Correlation import CorrelationState, non_feature_columns, prune_features
+from Rolling_Averages import build_testing_data
+from Storage import find_table, load_table
+from backends import default_params, make_model
+from model import id_columns, target
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit/predict time and MAE of a backend on the features left after correlation pruning.")
+    parser.add_argument("--data", default="rolling_averages.csv", help="rolling averages table")
+    parser.add_argument("--backend", choices=sorted(default_params), default="nusvr", help="regression backend")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[1.0, 0.95, 0.9, 0.85, 0.8, 0.7],
+                        help="pruning thresholds (1.0 keeps every feature)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of the latest games held out for MAE")
+    args = parser.parse_args()
+
+    df = load_table(find_table(args.data)).dropna().sort_values(by="Date", kind="stable").reset_index(drop=True)
+    columns = [col for col in df.columns if col not in non_feature_columns]
+
+    # Correlations from the training games only, so the held-out games do not pick the features
+    split = int(len(df) * (1 - args.holdout))
+    state = CorrelationState(columns)
+    state.update(df.iloc[:split])
+    corr = state.correlation()
+
+    # Held-out games get the features known before tip-off, as at prediction time
+    held_out = df.iloc[split:]
+    df_test = build_testing_data(df, held_out[id_columns])
+    known = df_test[columns].notna().all(axis=1).to_numpy()
+    y_train = df[target].to_numpy(dtype=np.float64)[:split]
+    y_test = held_out[target].to_numpy(dtype=np.float64)[known]
+    print(f"{split} training games, {known.sum()} held-out games, {args.backend}\n")
+
+    print(f"{'threshold':>9} {'features':>9} {'fit (s)':>8} {'predict (ms)':>13} {'speedup':>8} {'MAE':>6}")
+    baseline = None
+    for threshold in args.thresholds:
+        features = prune_features(corr, threshold)
+        X_train = df[features].to_numpy(dtype=np.float64)[:split]
+        X_test = df_test[features].to_numpy(dtype=np.float64)[known]
+
+        model = make_model(args.backend)
+        fit_time, _ = time_call(model.fit, X_train, y_train)
+        predict_time, y_pred = time_call(model.predict, X_test)
+        total = fit_time + predict_time
+        baseline = baseline or total
+        mae = mean_absolute_error(y_test, y_pred)
+        print(f"{threshold:>9.2f} {len(features):>9} {fit_time:>8.2f} {predict_time * 1000:>13.1f} "
+              f"{baseline / total:>7.2f}x {mae:>6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import sys
+import warnings
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+
+from common import time_call
+from Rolling_Averages import (
+    away_stats_columns, compute_rolling_features, feature_columns, home_stats_columns, load_game_stats, windows
+)
+
+# The per-column loop Rolling_Averages.py used before the single-pass engine,
+# kept as the reference for timing and comparison.
+def legacy_rolling_features(df):
+    df = df.copy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+        for window in windows:
+            for col in home_stats_columns:
+                df[f"{col}_avg_{window}"] = (
+                    df.groupby("Team_home")[col]
+                    .rolling(window, min_periods=1)
+                    .mean()
+                    .reset_index(level=0, drop=True)
+                )
+        for window in windows:
+            for col in away_stats_columns:
+                df[f"{col}_avg_{window}"] = (
+                    df.groupby("Team_away")[col]
+                    .rolling(window, min_periods=1)
+                    .mean()
+                    .reset_index(level=0, drop=True)
+                )
+    return df[feature_columns]
+
+def stack_seasons(df, copies):
+    """
+    Repeat the game history as extra seasons, shifting each copy past the end of the previous one.
+    """
+    span = df["Date"].max() - df["Date"].min() + pd.Timedelta(days=1)
+    frames = [df.assign(Date=df["Date"] + span * copy) for copy in range(copies)]
+    return pd.concat(frames, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rolling feature engine against the per-column loop.")
+    parser.add_argument("--games", default="game_stats.csv", help="game_stats.csv to build features from")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 5, 10], help="number of seasons-worth of copies to time")
+    args = parser.parse_args()
+
+    base = load_game_stats(args.games)
+
+    # Counting stats have integer sums, so both implementations must agree bit for bit. The
+    # percentage columns go through pandas' running add/remove sum, which drifts by a few ulps
+    # as the history grows (even its window-1 means differ from the game values), so the engine
+    # is checked against exact rational sums instead and the loop's drift is only reported.
+    percentage = np.array(["%" in col for col in feature_columns])
+
+    print(f"{'copies':>6} {'games':>7} {'loop (s)':>9} {'engine (s)':>11} {'speedup':>8} {'counts identical':>17} {'pct exact':>10} {'loop pct ulps':>14}")
+    all_match = True
+    for copies in args.copies:
+        df = stack_seasons(base, copies)
+        old_time, old = time_call(legacy_rolling_features, df, repeat=1)
+        new_time, new = time_call(compute_rolling_features, df)
+
+        old_values, new_values = old.to_numpy(), new.to_numpy()
+        identical = np.array_equal(old_values[:, ~percentage], new_values[:, ~percentage], equal_nan=True)
+        exact = matches_exact_means(df, new)
+        pct_old, pct_new = old_values[:, percentage], new_values[:, percentage]
+        ulps = np.nanmax(np.abs(pct_old - pct_new) / np.spacing(np.abs(pct_new)))
+        all_match &= identical and exact
+        print(f"{copies:>6} {len(df):>7} {old_time:>9.3f} {new_time:>11.4f} {old_time / new_time:>7.1f}x {str(identical):>17} {str(exact):>10} {ulps:>14.0f}")
+
+    if not all_match:
+        sys.exit(1)
+
+def matches_exact_means(df, features, samples=300, seed=0):
+    """
+    Compare sampled percentage features with the exactly summed window divided by its length.
+    """
+    rng = np.random.default_rng(seed)
+    for side, columns in [("Team_home", home_stats_columns), ("Team_away", away_stats_columns)]:
+        positions = df.groupby(side).cumcount().to_numpy()
+        team_rows = df.groupby(side).indices
+        teams = df[side].to_numpy()
+        for col in [col for col in columns if "%" in col]:
+            values = df[col].to_numpy()
+            for row in rng.choice(len(df), size=min(samples, len(df)), replace=False):
+                history = team_rows[teams[row]]
+                for window in windows:
+                    window_rows = history[max(0, positions[row] - window + 1):positions[row] + 1]
+                    exact = float(sum(Fraction(value) for value in values[window_rows])) / len(window_rows)
+                    if features.at[row, f"{col}_avg_{window}"] != exact:
+                        return False
+    return True
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import math
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(root, "Data"))
+sys.path.insert(0, os.path.join(root, "Model"))
+import Instrumentation
+from Instrumentation import stage
+from Preprocessing import combine_game_stats
+from Rolling_Averages import build_testing_data, feature_columns, write_rolling_averages
+from Synthetic_Box_Scores import generate_box_scores
+from backends import make_model
+from model import id_columns, target
+
+# Stages timed at every size, in pipeline order
+stage_names = ["generate", "combine_game_stats", "rolling averages", "testing data", "model fit", "model predict"]
+
+def run_size(seasons, backend, fit, log_file, profile, seed):
+    """
+    The pipeline stages on `seasons` synthetic seasons, in a fresh process so memory starts from
+    the same baseline at every size. Returns the stage records of the run.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        players_file = os.path.join(tmp, "player_boxscores.csv")
+        games_file = os.path.join(tmp, "game_stats.csv")
+        rolling_file = os.path.join(tmp, "rolling_averages.csv")
+
+        Instrumentation.start_run(log_file, profile)
+        try:
+            with stage("generate") as record:
+                players = generate_box_scores(seasons, seed=seed)
+                record.rows_out = len(players)
+            players.to_csv(players_file, index=False)
+            del players
+
+            combine_game_stats(players_file, games_file)
+            with stage("rolling averages") as record:
+                df = write_rolling_averages(games_file, rolling_file)
+                record.rows_out = len(df)
+
+            # Every game's pre-game features, as the backtest and tuning build them
+            df_test = build_testing_data(df, df[id_columns])
+
+            if fit:
+                train = df.dropna()
+                model = make_model(backend)
+                with stage("model fit", rows_in=len(train)):
+                    model.fit(train[feature_columns].to_numpy(dtype=np.float64), train[target].to_numpy(dtype=np.float64))
+                # The latest season's games, the size of a season of daily predictions
+                X_test = df_test[feature_columns].dropna().tail(1230).to_numpy(dtype=np.float64)
+                with stage("model predict", rows_in=len(X_test)):
+                    model.predict(X_test)
+        finally:
+            entry = Instrumentation.finish_run(seasons=seasons, backend=backend)
+    return entry["stages"]
+
+def growth_exponent(size_before, time_before, size_after, time_after):
+    # t ~ size^k between two sizes; k near 1 is linear, clearly above it superlinear
+    if not (time_before > 0 and time_after > 0) or size_after == size_before:
+        return None
+    return math.log(time_after / time_before) / math.log(size_after / size_before)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory of every pipeline stage on 1 to 20 synthetic seasons.")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[1, 5, 10, 20], help="season counts to run")
+    parser.add_argument("--backend", default="nusvr", help="regression backend to fit")
+    parser.add_argument("--max-fit-seasons", type=int, default=10, help="skip fit/predict above this many seasons (NuSVR grows quadratically or worse)")
+    parser.add_argument("--profile", choices=Instrumentation.profile_modes, help="also profile every stage")
+    parser.add_argument("--run-log", default=os.path.join(tempfile.gettempdir(), "scaling_runs.jsonl"), help="run log the stage records are appended to")
+    parser.add_argument("--superlinear", type=float, default=1.3, help="flag stages whose time grows faster than seasons^this")
+    parser.add_argument("--seed", type=int, default=0, help="generator seed")
+    args = parser.parse_args()
+
+    results = []
+    for seasons in args.seasons:
+        # One process per size, so peak memory is not inherited from a larger run
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            records = pool.submit(run_size, seasons, args.backend, seasons <= args.max_fit_seasons, args.run_log,
+                                  args.profile, args.seed).result()
+        for record in records:
+            if record["name"] in stage_names:
+                results.append({"seasons": seasons, "stage": record["name"], "rows": record["rows_in"] or record["rows_out"],
+                                 "wall_s": record["wall_s"], "cpu_s": record["cpu_s"],
+                                 "peak_rss_mb": record["peak_rss_mb"],
+                                 "rss_growth_mb": record["peak_rss_mb"] - record["rss_start_mb"]})
+    results = pd.DataFrame(results)
+
+    print(f"\n{'stage':>18} {'seasons':>8} {'rows':>9} {'wall (s)':>9} {'cpu (s)':>8} {'peak RSS (MB)':>14} {'+RSS (MB)':>10} {'growth':>7}")
+    flagged = []
+    for name in stage_names:
+        previous = None
+        for row in results[results["stage"] == name].to_dict("records"):
+            # Against the number of seasons: predict scores a fixed slate, but its cost grows with the training set
+            exponent = growth_exponent(previous["seasons"], previous["wall_s"], row["seasons"], row["wall_s"]) if previous else None
+            growth = "" if exponent is None else f"n^{exponent:.2f}"
+            if exponent is not None and exponent > args.superlinear and row["wall_s"] > 0.5:
+                growth += " !"
+                flagged.append(f"{name} ({previous['seasons']} -> {row['seasons']} seasons)")
+            print(f"{name:>18} {row['seasons']:>8} {row['rows']:>9} {row['wall_s']:>9.2f} {row['cpu_s']:>8.2f} "
+                  f"{row['peak_rss_mb']:>14.0f} {row['rss_growth_mb']:>10.0f} {growth:>7}")
+            previous = row
+
+    print(f"\nStage records appended to {args.run_log}.")
+    if flagged:
+        print(f"Superlinear (time grows faster than seasons^{args.superlinear}): {', '.join(flagged)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scraping Scripts"))
+from Scrape_Engine import ScrapeJob, next_selector, row_selector, scrape
+from Stats_Api import box_score_endpoint, box_score_fields, rows_from_payload
+
+# Stand-in for the nba.com box score page: a paginated table filled by JavaScript from a
+# leaguegamelog-shaped JSON response, plus slow assets the real page also pulls in
+page_template = """<!doctype html>
+<html><head>
+<link rel="stylesheet" href="/assets/style.css">
+<style>@font-face {{ font-family: stats; src: url(/assets/font.woff2); }}</style>
+</head><body>
+<img src="/assets/logo.png">
+<table><tbody class="Crom_body__UYOcU"></tbody></table>
+<button data-track="click" data-type="controls" data-pos="next">Next</button>
+<script>
+const perPage = {per_page};
+let rows = [], page = 0;
+const body = document.querySelector("tbody"), next = document.querySelector("button");
+function render() {{
+  body.innerHTML = rows.slice(page * perPage, (page + 1) * perPage)
+    .map(row => "<tr>" + row.map(value => "<td>" + value + "</td>").join("") + "</tr>").join("");
+  next.disabled = (page + 1) * perPage >= rows.length;
+}}
+next.onclick = () => {{ page++; setTimeout(render, {render_ms}); }};
+fetch("{endpoint}?Season={season}").then(() => fetch("/display?Season={season}"))
+  .then(response => response.json()).then(data => {{ rows = data; render(); }});
+</script>
+</body></html>"""
+
+def fake_payload(season, rows, seed=0):
+    # leaguegamelog-shaped payload; only the fields the box score table shows are filled in
+    rng = random.Random(f"{season}-{seed}")
+    headers = ["SEASON_ID", "PLAYER_ID"] + box_score_fields
+    row_set = []
+    for i in range(rows):
+        values = {field: rng.randint(0, 40) for field in box_score_fields}
+        values.update({
+            "PLAYER_NAME": f"Player {i % 450}", "TEAM_ABBREVIATION": "BOS", "MATCHUP": "BOS vs. NYK",
+            "GAME_DATE": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00", "WL": rng.choice("WL"),
+            "FG_PCT": rng.random(), "FG3_PCT": rng.random(), "FT_PCT": rng.random(),
+        })
+        row_set.append([season, i] + [values[field] for field in box_score_fields])
+    return {"resultSets": [{"name": "LeagueGameLog", "headers": headers, "rowSet": row_set}]}
+
+def as_text(rows):
+    # Cell texts as the table shows them, whichever way the rows were read
+    return [tuple(str(value) for value in row) for row in rows]
+
+def make_handler(payloads, per_page, asset_delay, render_ms):
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send(self, body, content_type):
+            body = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            season = parse_qs(url.query).get("Season", [""])[0]
+            if url.path == "/stats/players/boxscores":
+                self.send(page_template.format(per_page=per_page, render_ms=render_ms, endpoint=box_score_endpoint,
+                                               season=season), "text/html")
+            elif url.path == box_score_endpoint:
+                self.send(json.dumps(payloads[season]), "application/json")
+            elif url.path == "/display":
+                rows = [[str(value) for value in row] for row in rows_from_payload(payloads[season])]
+                self.send(json.dumps(rows), "application/json")
+            elif url.path.startswith("/assets/"):
+                # The real page's images, fonts and stylesheets, which add nothing to the data
+                time.sleep(asset_delay)
+                self.send("x" * 200_000, "application/octet-stream")
+            else:
+                self.send_error(404)
+    return Handler
+
+def tree_rss():
+    """
+    Resident memory in bytes of this process and all of its descendants (browsers included), Linux only.
+    """
+    parents = {}
+    for pid in os.listdir("/proc"):
+        if pid.isdigit():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    parents[int(pid)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError):
+                continue
+    tree, frontier = {os.getpid()}, [os.getpid()]
+    while frontier:
+        parent = frontier.pop()
+        children = [pid for pid, ppid in parents.items() if ppid == parent]
+        tree.update(children)
+        frontier += children
+
+    total = 0
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            continue
+    return total
+
+def measure(function, *args):
+    """
+    (seconds, peak resident memory in MB, result), sampling memory every 50ms.
+    """
+    peak, done = [0], threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], tree_rss())
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    return elapsed, peak[0] / 2**20, result
+
+# The scraper Box_Scores.py used before the shared engine: one browser per season in a process
+# pool, the whole body re-parsed on every page. Headless so it can run here; otherwise unchanged.
+def legacy_scrape_season(url, season):
+    from bs4 import BeautifulSoup
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_context().new_page()
+        page.goto(url, timeout=60000)
+        page.wait_for_selector(row_selector)
+        data = []
+        while True:
+            soup = BeautifulSoup(page.inner_html("body"), "html.parser")
+            data += [[td.get_text() for td in row.find_all("td")] for row in soup.select(row_selector)]
+            next_button = page.query_selector(next_selector)
+            if not next_button or next_button.is_disabled():
+                break
+            first_row = page.inner_text(f"{row_selector}:first-child")
+            next_button.click(timeout=10000)
+            # Wait for the next page; the legacy wait_for_selector returned at once and re-read the same rows
+            page.wait_for_function("([s, b]) => document.querySelector(s).innerText !== b",
+                                   arg=[f"{row_selector}:first-child", first_row])
+        browser.close()
+        return season, data
+
+def legacy_scrape(urls_seasons):
+    with Pool(processes=len(urls_seasons)) as pool:
+        return dict(pool.starmap(legacy_scrape_season, urls_seasons))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the shared async scraping engine with one browser per season, against a local stand-in server.")
+    parser.add_argument("--seasons", type=int, default=3, help="seasons to scrape")
+    parser.add_argument("--rows", type=int, default=2000, help="box score rows per season")
+    parser.add_argument("--per-page", type=int, default=100, help="table rows per page")
+    parser.add_argument("--asset-delay", type=float, default=0.3, help="seconds every image/font/stylesheet takes to load")
+    parser.add_argument("--concurrency", type=int, default=3, help="pages the engine keeps open at once")
+    args = parser.parse_args()
+
+    seasons = [f"20{20 + i}-{21 + i}" for i in range(args.seasons)]
+    payloads = {season: fake_payload(season, args.rows) for season in seasons}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(payloads, args.per_page, args.asset_delay, render_ms=20))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/stats/players/boxscores"
+    urls_seasons = [(f"{base}?Season={season}", season) for season in seasons]
+    expected = {season: as_text(rows_from_payload(payloads[season])) for season in seasons}
+
+    runs = {
+        "legacy (browser per season)": lambda: legacy_scrape(urls_seasons),
+        "engine table": lambda: scrape([ScrapeJob(season, url) for url, season in urls_seasons],
+                                       concurrency=args.concurrency),
+        "engine api": lambda: {season: rows_from_payload(payload)
+                               for season, payload in scrape([ScrapeJob(season, url, mode="api", endpoint=box_score_endpoint)
+                                                              for url, season in urls_seasons],
+                                                             concurrency=args.concurrency).items()},
+    }
+
+    print(f"{len(seasons)} seasons x {args.rows} rows, {args.per_page} rows per page\n")
+    print(f"{'scraper':>28} {'time (s)':>9} {'peak RSS (MB)':>14} {'rows match':>11}")
+    all_match = True
+    for name, run in runs.items():
+        elapsed, peak_mb, result = measure(run)
+        match = {season: as_text(rows) for season, rows in result.items()} == expected
+        all_match &= match
+        print(f"{name:>28} {elapsed:>9.2f} {peak_mb:>14.0f} {str(match):>11}")
+
+    server.shutdown()
+    if not all_match:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
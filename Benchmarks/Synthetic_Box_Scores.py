@@ -0,0 +1,136 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(root, "Data"))
+from Daily_Matchups import team_abbreviations
+
+# The columns Box_Scores.py writes to player_boxscores.csv
+box_score_col = [
+    "Player", "Team", "Opponent", "Date", "Result", "Minutes", "Points",
+    "FGM", "FGA", "FG%", "3PM", "3PA", "3P%", "FTM", "FTA", "FT%",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TO", "PF", "+/-", "SPI"
+]
+
+# Share of a team's 240 minutes for each roster spot, starters first
+minute_shares = np.array([36, 35, 34, 33, 31, 25, 20, 16, 10, 7, 5, 3, 2], dtype=np.float64)
+
+def team_codes(teams):
+    codes = sorted(set(team_abbreviations.values()))
+    return codes[:teams] + [f"X{i:02d}" for i in range(teams - len(codes))]
+
+def season_schedule(teams, games_per_team, rng):
+    """
+    (round, home, away) for a season: every round each team plays once, against a random opponent.
+    """
+    rounds = []
+    for round_number in range(games_per_team):
+        order = rng.permutation(teams)
+        pairs = order[:teams - teams % 2].reshape(-1, 2)
+        rounds.append(np.column_stack([np.full(len(pairs), round_number), pairs]))
+    return np.concatenate(rounds)
+
+def generate_box_scores(seasons=1, teams=30, games_per_team=82, players_per_team=13, first_season=2024, seed=0):
+    """
+    Seeded synthetic player box scores in the schema of player_boxscores.csv (box_score_col plus
+    Season), sorted by date: "HOME vs. AWAY" for home players and "AWAY @ HOME" for away players,
+    consistent makes/attempts, Points = 2 FGM + 3PM + FTM and each team's players summing to its score.
+    """
+    rng = np.random.default_rng(seed)
+    codes = np.array(team_codes(teams))
+    strength = rng.normal(0, 0.03, teams)
+    shares = minute_shares[:players_per_team] if players_per_team <= len(minute_shares) \
+        else np.concatenate([minute_shares, np.full(players_per_team - len(minute_shares), 2.0)])
+
+    frames = []
+    for season_index in range(seasons):
+        year = first_season + season_index
+        season = f"{year}-{(year + 1) % 100:02d}"
+        games = season_schedule(teams, games_per_team, rng)
+        # Two game days per round, every other day from late October
+        first_day = pd.Timestamp(f"{year}-10-22")
+        dates = first_day + pd.to_timedelta(games[:, 0] * 2 + np.arange(len(games)) % 2, unit="D")
+
+        # One row per player per side per game: home players first, then away players
+        n = len(games)
+        rows = n * 2 * players_per_team
+        side_team = np.concatenate([games[:, 1], games[:, 2]])
+        other_team = np.concatenate([games[:, 2], games[:, 1]])
+        is_away = np.repeat(np.arange(2 * n) >= n, players_per_team)
+        team = np.repeat(side_team, players_per_team)
+        opponent_team = np.repeat(other_team, players_per_team)
+        game = np.concatenate([np.repeat(np.arange(n), players_per_team)] * 2)
+        slot = np.tile(np.arange(players_per_team), 2 * n)
+        # Index of the row's (game, side) team line
+        line = np.arange(rows) // players_per_team
+
+        # Minutes: the roster's shares of 240 with some noise
+        minutes = shares[slot] * rng.uniform(0.8, 1.2, rows)
+        minutes = np.round(minutes / np.bincount(line, minutes)[line] * 240)
+
+        fga = rng.poisson(minutes * 0.42)
+        three_pa = rng.binomial(fga, 0.4)
+        three_pm = rng.binomial(three_pa, np.clip(0.36 + strength[team], 0, 1))
+        fgm = three_pm + rng.binomial(fga - three_pa, np.clip(0.53 + strength[team], 0, 1))
+        fta = rng.poisson(minutes * 0.12)
+        ftm = rng.binomial(fta, 0.78)
+        oreb = rng.poisson(minutes * 0.05)
+        dreb = rng.poisson(minutes * 0.15)
+        points = 2 * fgm + three_pm + ftm
+        ast, tov, stl, blk, pf = (rng.poisson(minutes * rate) for rate in (0.1, 0.05, 0.03, 0.02, 0.08))
+
+        # Team scores decide the result and the plus-minus of everyone on the floor
+        team_points = np.bincount(line, points)
+        side_diff = team_points[:n] - team_points[n:]
+        diff = np.concatenate([side_diff, -side_diff])[line]
+        # A tied game goes to the home side
+        result = np.where((diff > 0) | ((diff == 0) & ~is_away), "W", "L")
+
+        def percent(made, attempted):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.round(np.where(attempted > 0, made / attempted * 100, 0.0), 1)
+
+        home_code = pd.Series(np.where(is_away, codes[opponent_team], codes[team]))
+        away_code = pd.Series(np.where(is_away, codes[team], codes[opponent_team]))
+        df = pd.DataFrame({
+            "Player": pd.Series(codes[team]) + " Player " + pd.Series(slot).astype(str),
+            "Team": codes[team],
+            "Opponent": np.where(is_away, away_code + " @ " + home_code, home_code + " vs. " + away_code),
+            "Date": dates[game],
+            "Result": result,
+            "Minutes": minutes.astype(int),
+            "Points": points,
+            "FGM": fgm, "FGA": fga, "FG%": percent(fgm, fga),
+            "3PM": three_pm, "3PA": three_pa, "3P%": percent(three_pm, three_pa),
+            "FTM": ftm, "FTA": fta, "FT%": percent(ftm, fta),
+            "OREB": oreb, "DREB": dreb, "REB": oreb + dreb,
+            "AST": ast, "STL": stl, "BLK": blk, "TO": tov, "PF": pf,
+            "+/-": np.round(diff * minutes / 48).astype(int),
+            "SPI": np.round(points + 1.2 * (oreb + dreb) + 1.5 * ast + 3 * stl + 3 * blk - tov, 1),
+        })
+        df["Season"] = season
+        frames.append(df[box_score_col + ["Season"]])
+
+    # The scraped file is sorted by date and opponent, not grouped by game
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values(by=["Date", "Opponent"], kind="stable").reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write seeded synthetic player box scores in the scraped schema.")
+    parser.add_argument("--seasons", type=int, default=1, help="seasons to generate")
+    parser.add_argument("--teams", type=int, default=30, help="teams in the league")
+    parser.add_argument("--games", type=int, default=82, help="games per team per season")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", default="player_boxscores.csv", help="CSV to write")
+    args = parser.parse_args()
+
+    df = generate_box_scores(args.seasons, args.teams, args.games, seed=args.seed)
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df)} player rows ({df['Season'].nunique()} seasons) to {args.output}.")
+
+if __name__ == "__main__":
+    main()
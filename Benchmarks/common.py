@@ -0,0 +1,21 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# The project's modules, importable by name as the scripts in each folder import each other
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("Scraping Scripts", "Data", "Model"):
+    sys.path.insert(0, os.path.join(root, folder))
+
+def time_call(func, *args, repeat=3):
+    """
+    Best wall time of repeat calls of func(*args), and the result of the last one.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -1,16 +1,178 @@
+import argparse
+import json
+import os
+
+import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-df = pd.read_csv('rolling_averages.csv')
-training_data = df.drop(columns=["Date", "Team_home", "Team_away", "Point_diff"])
-correlation_matrix = training_data.corr()
+from Storage import find_table, load_table
+
+# Running correlation statistics of the feature columns and the pruned feature list, kept in the
+# working directory with the data
+state_file = "feature_correlation.npz"
+features_file = "selected_features.json"
+
+# Columns of rolling_averages.csv that are not features
+non_feature_columns = ["Date", "Team_home", "Team_away", "Point_diff"]
+
+# Columns that identify a game in the checksum of the games a state has seen
+key_columns = ["Date", "Team_home", "Team_away"]
+
+def row_checksum(df, columns):
+    """
+    Wrapping uint64 sum of the row hashes of the games' keys and columns. The sum does not depend on
+    row order, so a state can add the checksum of each batch to that of the games before it.
+    """
+    hashes = pd.util.hash_pandas_object(df[key_columns + columns], index=False).to_numpy()
+    return int(hashes.sum(dtype=np.uint64))
+
+class CorrelationState:
+    """
+    Row count, column means and centered cross products of the feature columns, enough to give
+    their correlation matrix. Games are added in batches (merged with Chan's pairwise update),
+    so new games cost the same however long the history is. checksum identifies the games added.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.rows = 0
+        self.last_date = None
+        self.checksum = 0
+        self.mean = np.zeros(len(self.columns))
+        self.cross = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, df):
+        """
+        Add chronologically sorted games (rows with missing features are left out, as in training).
+        """
+        df = df.dropna(subset=self.columns)
+        if df.empty:
+            return
+        X = df[self.columns].to_numpy(dtype=np.float64)
+        batch_mean = X.mean(axis=0)
+        centered = X - batch_mean
+        batch_cross = centered.T @ centered
+
+        rows = self.rows + len(X)
+        delta = batch_mean - self.mean
+        self.cross += batch_cross + np.outer(delta, delta) * self.rows * len(X) / rows
+        self.mean += delta * len(X) / rows
+        self.rows = rows
+        self.last_date = str(df["Date"].max())[:10]
+        self.checksum = (self.checksum + row_checksum(df, self.columns)) % 2 ** 64
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.cross))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.cross / np.outer(std, std)
+        # Constant columns correlate with nothing
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def save(self, path):
+        temp_file = path + ".tmp"
+        with open(temp_file, "wb") as f:
+            np.savez(f, columns=np.array(self.columns), rows=self.rows, last_date=str(self.last_date),
+                     checksum=np.uint64(self.checksum), mean=self.mean, cross=self.cross)
+        os.replace(temp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            state = cls(data["columns"].tolist())
+            state.rows = int(data["rows"])
+            state.last_date = None if str(data["last_date"]) == "None" else str(data["last_date"])
+            # States saved before the checksum was kept never match, so they are rebuilt once
+            state.checksum = int(data["checksum"]) if "checksum" in data else None
+            state.mean = data["mean"]
+            state.cross = data["cross"]
+        return state
+
+def update_correlations(df, path=state_file):
+    """
+    Correlation state of the features in df, with only the games after the saved state's last date
+    added to it. The state is rebuilt from all games when the feature columns or the earlier games
+    have changed: the earlier games are checked against the state's checksum of the games it holds,
+    which costs one hash pass over the history but no statistics.
+    """
+    df = df.sort_values(by="Date", kind="stable")
+    columns = [col for col in df.columns if col not in non_feature_columns]
+
+    state = CorrelationState.load(path) if os.path.exists(path) else None
+    if state is not None and state.columns == columns and state.last_date is not None:
+        seen = df["Date"] <= pd.Timestamp(state.last_date)
+        earlier = df[seen].dropna(subset=columns)
+        if len(earlier) == state.rows and row_checksum(earlier, columns) == state.checksum:
+            new_games = df[~seen]
+            print(f"Adding {len(new_games)} games after {state.last_date} to the feature correlations.")
+            state.update(new_games)
+            state.save(path)
+            return state
+
+    state = CorrelationState(columns)
+    state.update(df)
+    state.save(path)
+    return state
+
+def prune_features(corr, threshold=0.7):
+    """
+    Features to keep: each one in column order unless its absolute correlation with a feature
+    already kept is above threshold.
+    """
+    values = np.abs(corr.to_numpy())
+    kept = []
+    for i in range(len(corr.columns)):
+        if not kept or values[i, kept].max() <= threshold:
+            kept.append(i)
+    return [corr.columns[i] for i in kept]
+
+def save_selected_features(features, threshold, path=features_file):
+    with open(path, "w") as f:
+        json.dump({"threshold": threshold, "features": features}, f, indent=2)
+
+def load_selected_features(path=features_file):
+    """
+    The pruned feature list, or None if features were never pruned.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["features"]
+
+def write_selected_features(data="rolling_averages.csv", threshold=0.7, output_file=features_file):
+    """
+    Bring the correlation state up to date with the rolling averages and write the features left
+    after pruning at threshold.
+    """
+    state = update_correlations(load_table(find_table(data)))
+    features = prune_features(state.correlation(), threshold)
+    save_selected_features(features, threshold, output_file)
+    print(f"Kept {len(features)} of {len(state.columns)} features (|r| <= {threshold}), saved to {output_file}.")
+    return features
+
+def plot_correlations(corr):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Set up the matplotlib figure
+    plt.figure(figsize=(12, 8))
+
+    # Create a heatmap of the correlation matrix
+    sns.heatmap(corr, annot=False, cmap='coolwarm', linewidths=0.5)
+
+    # Display the plot
+    plt.show()
 
-# Set up the matplotlib figure
-plt.figure(figsize=(12, 8))
+def main():
+    parser = argparse.ArgumentParser(description="Prune features of rolling_averages.csv that are near-duplicates of others.")
+    parser.add_argument("--threshold", type=float, default=0.7, help="drop a feature whose |correlation| with a kept one is above this")
+    parser.add_argument("--plot", action="store_true", help="show a heatmap of the correlation matrix")
+    args = parser.parse_args()
 
-# Create a heatmap of the correlation matrix
-sns.heatmap(correlation_matrix, annot=False, cmap='coolwarm', linewidths=0.5)
+    write_selected_features(threshold=args.threshold)
+    if args.plot:
+        plot_correlations(CorrelationState.load(state_file).correlation())
 
-# Display the plot
-plt.show()
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
+import os
 import pandas as pd
 from datetime import datetime
 
+from Storage import load_table, save_table
+
 # Mapping of NBA team names to their three-letter abbreviations
 team_abbreviations = {
     "Atlanta Hawks": "ATL",
@@ -35,43 +38,120 @@ team_abbreviations = {
     "Washington Wizards": "WAS"
 }
 
-def save_todays_matchups():
+def parse_schedule(schedule_file="2024-25_schedule.csv"):
     """
-    Load 2024-25_schedule.csv, convert team names to abbreviations, and save only today's games to a new CSV.
+    Parse the season schedule into date-sorted (Date, Team_home, Team_away) rows with team abbreviations.
     """
-    # Load the schedule CSV
-    schedule_df = pd.read_csv("2024-25_schedule.csv")
-    
+    # Load the schedule CSV, team names as categories so each name is mapped once rather than per row
+    schedule_df = pd.read_csv(schedule_file, usecols=['Game Date', 'Visitor/Neutral', 'Home/Neutral'],
+                              dtype={'Visitor/Neutral': 'category', 'Home/Neutral': 'category'})
+
     # Rename columns for consistency
-    schedule_df.rename(columns={
+    schedule_df = schedule_df.rename(columns={
         'Game Date': 'Date',
         'Visitor/Neutral': 'Team_away',
         'Home/Neutral': 'Team_home'
-    }, inplace=True)
-    
-    # Parse the 'Date' column to datetime format based on the given format in the file
-    schedule_df['Date'] = pd.to_datetime(schedule_df['Date'], format="%a, %b %d, %Y")
-    
+    })
+
+    # Parse each distinct date once with the format used in the file
+    dates = schedule_df['Date'].unique()
+    parsed = pd.Series(pd.to_datetime(dates, format="%a, %b %d, %Y"), index=dates)
+    schedule_df['Date'] = schedule_df['Date'].map(parsed)
+
+    # Map team names to abbreviations; codes share one category list for both sides
+    codes = sorted(set(team_abbreviations.values()))
+    for col in ['Team_home', 'Team_away']:
+        schedule_df[col] = pd.Categorical(schedule_df[col].map(team_abbreviations).astype(object), categories=codes)
+
+    # Drop rows where mapping is missing (i.e., teams not in the abbreviation dictionary)
+    schedule_df = schedule_df.dropna(subset=['Team_home', 'Team_away'])
+
+    schedule_df = schedule_df[['Date', 'Team_home', 'Team_away']].sort_values(by='Date', kind='stable')
+    return schedule_df.reset_index(drop=True)
+
+def schedule_cache_file(schedule_file):
+    return os.path.splitext(schedule_file)[0] + "_cache.arrow"
+
+# Parsed schedules of this process, by file, with the modification time they were read at
+_schedules = {}
+
+def load_schedule(schedule_file="2024-25_schedule.csv"):
+    """
+    The season schedule as (Team_home, Team_away) rows on a sorted Date index, so a day, a date range
+    or a team's games are binary-search slices. The parsed schedule is cached in an Arrow file next to
+    the CSV (when pyarrow is installed) and in memory, and parsed again only when the CSV changes.
+    """
+    mtime = os.path.getmtime(schedule_file)
+    cached = _schedules.get(schedule_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    cache_file = schedule_cache_file(schedule_file)
+    schedule_df = None
+    if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= mtime:
+        try:
+            schedule_df = load_table(cache_file)
+        except ImportError:
+            pass
+    if schedule_df is None:
+        schedule_df = parse_schedule(schedule_file)
+        try:
+            save_table(schedule_df, cache_file)
+        except ImportError:
+            pass
+
+    schedule = schedule_df.set_index('Date')
+    _schedules[schedule_file] = (mtime, schedule, {})
+    return schedule
+
+def _as_matchups(games):
+    # Date back as YYYY-MM-DD strings like the daily matchups files
+    games = games.reset_index()
+    return games.assign(Date=games['Date'].dt.strftime("%Y-%m-%d"))
+
+def matchups_between(start_date, end_date=None, schedule_file="2024-25_schedule.csv"):
+    """
+    All scheduled matchups from start_date through end_date (inclusive; a single day by default),
+    with Date as YYYY-MM-DD strings like the daily matchups files.
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize() if end_date is not None else start
+    return _as_matchups(load_schedule(schedule_file).loc[start:end])
+
+def team_games(team, start_date=None, end_date=None, schedule_file="2024-25_schedule.csv"):
+    """
+    One team's scheduled games, home or away, from start_date through end_date (both optional).
+    """
+    schedule = load_schedule(schedule_file)
+    by_team = _schedules[schedule_file][2]
+    if team not in by_team:
+        # Each team's games are split out once per schedule version, then sliced by date
+        by_team[team] = schedule[(schedule['Team_home'] == team) | (schedule['Team_away'] == team)]
+    start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+    end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+    return _as_matchups(by_team[team].loc[start:end])
+
+def upcoming_games(team, count=None, from_date=None, schedule_file="2024-25_schedule.csv"):
+    """
+    A team's next games from from_date (default: today) on, optionally only the next count of them.
+    """
+    games = team_games(team, from_date or datetime.now().date(), schedule_file=schedule_file)
+    return games if count is None else games.head(count)
+
+def save_todays_matchups():
+    """
+    Load 2024-25_schedule.csv, convert team names to abbreviations, and save only today's games to a new CSV.
+    """
     # Get today's date
     today = datetime.now().date()
-    
+
     # Filter for games that are happening today
-    todays_games = schedule_df[schedule_df['Date'].dt.date == today]
-    
-    # Map team names to abbreviations
-    todays_games['Team_home'] = todays_games['Team_home'].map(team_abbreviations)
-    todays_games['Team_away'] = todays_games['Team_away'].map(team_abbreviations)
-    
-    # Drop rows where mapping is missing (i.e., teams not in the abbreviation dictionary)
-    todays_games.dropna(subset=['Team_home', 'Team_away'], inplace=True)
-    
-    # Select only the necessary columns
-    todays_games = todays_games[['Date', 'Team_home', 'Team_away']]
-    
+    todays_games = matchups_between(today)
+
     # Save to a new CSV with today's date in the filename
     filename = f"{today}_matchups.csv"
     todays_games.to_csv(filename, index=False)
     print(f"Saved today's matchups to {filename}")
 
-# Run the function
-save_todays_matchups()
+if __name__ == "__main__":
+    save_todays_matchups()
@@ -0,0 +1,257 @@
+import argparse
+import contextvars
+import cProfile
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Run log of the pipeline: one JSON object per run, appended, so runs can be compared over time
+run_log_file = "run_log.jsonl"
+profile_dir = "profiles"
+profile_modes = ("cprofile", "tracemalloc")
+
+# The run being recorded, if any; stages outside a run cost nothing
+_run = None
+_lock = threading.Lock()
+# Enclosing stages, per thread and per asyncio task
+_stack = contextvars.ContextVar("stage_stack", default=())
+_local = threading.local()
+
+def current_rss():
+    """
+    Resident memory of this process in bytes (Linux); the peak so far elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return max_rss()
+
+def max_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class StageRecord:
+    """
+    Measurements of one stage. Callers fill in rows_in / rows_out (and anything else worth
+    keeping in extra) while the stage runs.
+    """
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.rows_in = None
+        self.rows_out = None
+        self.extra = {}
+        self.peak_rss = 0
+
+    def to_dict(self):
+        record = {
+            "name": self.name,
+            "parent": self.parent,
+            "started": self.started,
+            "wall_s": round(self.wall, 6),
+            "cpu_s": round(self.cpu, 6),
+            "rss_start_mb": round(self.rss_start / 2**20, 1),
+            "rss_end_mb": round(self.rss_end / 2**20, 1),
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+        }
+        record.update(self.extra)
+        return record
+
+class Run:
+    def __init__(self, log_file, profile, sample_interval):
+        if profile not in (None,) + profile_modes:
+            raise ValueError(f"Unknown profile mode {profile!r}; choose from {profile_modes}")
+        self.log_file = log_file
+        self.profile = profile
+        self.sample_interval = sample_interval
+        self.id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.records = []
+        self.active = set()
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        # One thread samples memory for all running stages, so a stage's peak covers its whole run
+        while not self._done.wait(self.sample_interval):
+            rss = current_rss()
+            with _lock:
+                for record in self.active:
+                    record.peak_rss = max(record.peak_rss, rss)
+
+def start_run(log_file=run_log_file, profile=None, sample_interval=0.05):
+    """
+    Start recording stages. profile="cprofile" also writes a cProfile file per top-level stage to
+    profile_dir; profile="tracemalloc" adds each stage's peak traced memory and top allocation sites.
+    Those are process-wide, so they only belong to one stage when top-level stages run one at a time.
+    """
+    global _run
+    _run = Run(log_file, profile, sample_interval)
+    if profile == "tracemalloc" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _run._sampler.start()
+    return _run
+
+def finish_run(**details):
+    """
+    Stop recording and append the run (its stages in the order they finished) to the run log.
+    """
+    global _run
+    run, _run = _run, None
+    if run is None:
+        return None
+    run._done.set()
+    run._sampler.join()
+    if run.profile == "tracemalloc":
+        tracemalloc.stop()
+
+    entry = {
+        "run": run.id,
+        "started": run.started,
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "argv": sys.argv,
+        "profile": run.profile,
+        "peak_rss_mb": round(max_rss() / 2**20, 1),
+        **details,
+        "stages": [record.to_dict() for record in run.records],
+    }
+    os.makedirs(os.path.dirname(run.log_file) or ".", exist_ok=True)
+    with open(run.log_file, "a") as f:
+        f.write(json.dumps(entry, default=str) + "\n")
+    print(f"Run {run.id}: {len(run.records)} stages logged to {run.log_file}.")
+    return entry
+
+@contextmanager
+def instrumented_run(log_file=run_log_file, profile=None, **details):
+    start_run(log_file, profile)
+    try:
+        yield
+    finally:
+        finish_run(**details)
+
+def _profile_file(run, name):
+    os.makedirs(profile_dir, exist_ok=True)
+    return os.path.join(profile_dir, f"{run.id}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.prof")
+
+@contextmanager
+def stage(name, rows_in=None, profile=True):
+    """
+    Record wall time, CPU time, resident memory and row counts of the block as one stage of the
+    current run (a no-op outside a run). Stages nest; CPU time is the whole process's, so stages
+    running concurrently in threads share it. With profile=False the stage is never profiled.
+    """
+    run = _run
+    if run is None:
+        yield StageRecord(name)
+        return
+
+    stack = _stack.get()
+    record = StageRecord(name, parent=stack[-1].name if stack else None)
+    record.rows_in = rows_in
+    record.started = datetime.now().isoformat(timespec="milliseconds")
+
+    # cProfile follows one thread, and only one profiler can be active in it
+    profiler = None
+    if run.profile == "cprofile" and profile and not getattr(_local, "profiling", False):
+        profiler = cProfile.Profile()
+        _local.profiling = True
+    traced = run.profile == "tracemalloc" and profile and not stack
+    if traced:
+        tracemalloc.reset_peak()
+        snapshot_before = tracemalloc.take_snapshot()
+
+    token = _stack.set(stack + (record,))
+    record.rss_start = record.peak_rss = current_rss()
+    with _lock:
+        run.active.add(record)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _local.profiling = False
+        record.wall = time.perf_counter() - wall_start
+        record.cpu = time.process_time() - cpu_start
+        record.rss_end = current_rss()
+        _stack.reset(token)
+        with _lock:
+            run.active.discard(record)
+            record.peak_rss = max(record.peak_rss, record.rss_end)
+
+        if profiler is not None:
+            record.extra["profile_file"] = _profile_file(run, name)
+            profiler.dump_stats(record.extra["profile_file"])
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")[:10]
+            record.extra["traced_peak_mb"] = round(peak / 2**20, 1)
+            record.extra["top_allocations"] = [
+                {"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 "size_mb": round(stat.size_diff / 2**20, 2), "count": stat.count_diff}
+                for stat in top
+            ]
+        with _lock:
+            run.records.append(record)
+
+def load_runs(path=run_log_file):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare_runs(previous, latest):
+    """
+    Per stage name: wall time, CPU time and peak RSS of the latest run against a previous one.
+    Stages recorded several times in a run (e.g. pages) are summed, memory taken at its peak.
+    """
+    def totals(run):
+        stages = {}
+        for record in run["stages"]:
+            total = stages.setdefault(record["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0})
+            total["count"] += 1
+            total["wall_s"] += record["wall_s"]
+            total["cpu_s"] += record["cpu_s"]
+            total["peak_rss_mb"] = max(total["peak_rss_mb"], record["peak_rss_mb"])
+        return stages
+
+    before, after = totals(previous), totals(latest)
+    rows = []
+    for name, stats in after.items():
+        old = before.get(name)
+        rows.append({"stage": name, **stats,
+                     "wall_change": stats["wall_s"] / old["wall_s"] - 1 if old and old["wall_s"] else None})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the latest run in the run log with an earlier one.")
+    parser.add_argument("--log", default=run_log_file, help="run log (JSON lines)")
+    parser.add_argument("--against", type=int, default=-2, help="index of the run to compare with (default: the one before the latest)")
+    args = parser.parse_args()
+
+    runs = load_runs(args.log)
+    if len(runs) < 2:
+        sys.exit(f"{args.log} has {len(runs)} run(s); need two to compare.")
+    previous, latest = runs[args.against], runs[-1]
+    print(f"Run {latest['run']} against {previous['run']}\n")
+    print(f"{'stage':>32} {'count':>6} {'wall (s)':>9} {'cpu (s)':>8} {'peak RSS (MB)':>14} {'wall change':>12}")
+    for row in compare_runs(previous, latest):
+        change = "new" if row["wall_change"] is None else f"{row['wall_change']:+.0%}"
+        print(f"{row['stage'][:32]:>32} {row['count']:>6} {row['wall_s']:>9.2f} {row['cpu_s']:>8.2f} "
+              f"{row['peak_rss_mb']:>14.0f} {change:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from Instrumentation import stage
+from Preprocessing import prepend_games, read_rows_since, stat_columns
+from Rolling_Averages import rolling_means, windows
+from Storage import save_typed_copy
+
+# Player stats the windows are taken over; the team features are built from their per-minute rates
+player_stats = stat_columns + ['+/-']
+player_columns = ['Player', 'Team', 'Opponent', 'Date', 'Minutes'] + player_stats
+sides = ['home', 'away']
+
+# Every window, home then away, Minutes then the stats: same layout as Rolling_Averages.feature_columns
+player_feature_columns = [
+    f"{stat}_{side}_pavg_{window}"
+    for window in windows
+    for side in sides
+    for stat in ['Minutes'] + player_stats
+]
+
+def tail_file(output_file):
+    return os.path.splitext(output_file)[0] + '_tail.csv'
+
+def game_sides(df):
+    """
+    Date, Team_home, Team_away and is_away of every player row, from its 'Opponent'
+    ("HOME vs. AWAY" for home players, "AWAY @ HOME" for away players).
+    """
+    # A few thousand distinct matchup strings cover every row, so only those are parsed
+    codes, matchups = pd.factorize(df['Opponent'])
+    matchups = pd.Series(matchups)
+    is_away = matchups.str.contains('@', regex=False).to_numpy()[codes]
+    opponent = pd.Series(matchups.str.split(r' @ | vs\. ', n=1, regex=True).str[1].to_numpy()[codes], index=df.index)
+    return pd.DataFrame({
+        'Date': df['Date'].astype(str).str[:10],
+        'Team_home': opponent.where(is_away, df['Team']),
+        'Team_away': df['Team'].where(is_away, opponent),
+        'is_away': is_away,
+    }, index=df.index)
+
+def player_team_features(df, games=None):
+    """
+    Minutes-weighted team features for every game in df, a chronological player box score table.
+    Each player's rolling averages include the game itself, as the team rolling averages do. For each
+    side of a game, every stat is the sum over the players who played of their rolling per-minute rate
+    times their minutes in that game: the team total the rotation that actually played would produce.
+    Minutes is the minutes-weighted mean of those players' rolling minutes, which drops when regulars
+    sit out. games, a set of Date/Team_home/Team_away rows, limits the output to those games.
+    """
+    with stage("player rolling windows", rows_in=len(df)) as record:
+        values = df[['Minutes'] + player_stats].to_numpy(dtype=np.float64)
+        means = rolling_means(df['Player'].to_numpy(), values, windows)
+        record.rows_out = len(means)
+
+    keys = game_sides(df)
+    if games is not None:
+        wanted = keys[['Date', 'Team_home', 'Team_away']].merge(
+            games[['Date', 'Team_home', 'Team_away']].astype(str).drop_duplicates(), how='left', indicator=True)
+        keep = (wanted['_merge'] == 'both').to_numpy()
+        keys, means, values = keys[keep], means[keep], values[keep]
+
+    with stage("player team features", rows_in=len(keys)) as record:
+        # Row numbers of the players of every (game, side), one line per side, padded to the largest roster
+        grouped = keys.groupby(['Date', 'Team_home', 'Team_away'], sort=True)
+        line = grouped.ngroup().to_numpy() * 2 + keys['is_away'].to_numpy()
+        order = np.argsort(line, kind='stable')
+        starts = np.flatnonzero(np.diff(line[order], prepend=-1))
+        sizes = np.diff(np.append(starts, len(order)))
+        slot = np.arange(len(order)) - np.repeat(starts, sizes)
+        members = np.zeros((len(starts), slot.max() + 1 if len(order) else 0), dtype=np.int64)
+        members[np.repeat(np.arange(len(starts)), sizes), slot] = order
+        played = np.arange(members.shape[1]) < sizes[:, None]
+
+        # rate * minutes is mean * (minutes / rolling minutes): one weight per player and window.
+        # Players with no minutes in their window contribute nothing rather than NaN
+        minutes = np.where(played, np.nan_to_num(values[members, 0]), 0.0)
+        roster = means[members]
+        if np.isnan(values).any():
+            np.nan_to_num(roster, copy=False)
+        rolling_minutes = roster[:, :, :, 0].copy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = np.where(rolling_minutes > 0, minutes[:, :, None] / rolling_minutes, 0.0)
+        roster *= weights[..., None]
+        totals = roster.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            totals[:, :, 0] = (rolling_minutes * minutes[:, :, None]).sum(axis=1) / minutes.sum(axis=1)[:, None]
+
+        # (games, sides, windows, stats) -> (games, windows, sides, stats) flattens to player_feature_columns
+        ids = grouped.size().index.to_frame(index=False)
+        block = np.full((len(ids), 2) + totals.shape[1:], np.nan)
+        lines = line[order[starts]]
+        block[lines // 2, lines % 2] = totals
+        block = block.transpose(0, 2, 1, 3).reshape(len(ids), -1)
+
+        # Games missing a side are dropped, as aggregate_game_stats drops them
+        both = np.bincount(lines // 2, minlength=len(ids)) == 2
+        features = pd.concat([ids[both], pd.DataFrame(block[both], columns=player_feature_columns, index=ids.index[both])], axis=1)
+        record.rows_out = len(features)
+
+    return features.sort_values(by=['Date', 'Team_home'], ascending=False).reset_index(drop=True)
+
+def save_tail(df, output_file):
+    # Every player's last max(windows) rows: all the history a window over their next game reaches
+    tail = df.groupby('Player', sort=False).tail(max(windows))
+    temp_file = tail_file(output_file) + '.tmp'
+    tail[player_columns].to_csv(temp_file, index=False)
+    os.replace(temp_file, tail_file(output_file))
+
+def write_player_features(input_file="player_boxscores.csv", output_file="player_features.csv"):
+    """
+    Build the player-based features of every game in input_file and save them newest first, plus a
+    typed copy and the tail of player rows that update_player_features continues from.
+    """
+    df = pd.read_csv(input_file, usecols=player_columns, dtype={'Date': str})
+    df = df.assign(Date=df['Date'].str[:10]).sort_values(by='Date', kind='stable').reset_index(drop=True)
+
+    features = player_team_features(df)
+    features.to_csv(output_file, index=False)
+    save_typed_copy(features, output_file, float32_columns=player_feature_columns)
+    save_tail(df, output_file)
+
+    print(f"Saved player features of {len(features)} games to {output_file}.")
+    return features
+
+def update_player_features(input_file="player_boxscores.csv", output_file="player_features.csv"):
+    """
+    Add the games of the player rows dated on or after the tail's last date to output_file. Only the
+    new rows and the players' stored tails are windowed, so the cost depends on the new dates only.
+    Falls back to a full build when there is no tail yet. Returns the new feature rows.
+    """
+    if not os.path.exists(tail_file(output_file)) or not os.path.exists(output_file):
+        return write_player_features(input_file, output_file)
+
+    tail = pd.read_csv(tail_file(output_file), dtype={'Date': str})
+    last_date = tail['Date'].max()
+    new_rows = read_rows_since(input_file, last_date)[player_columns]
+    new_rows = new_rows.assign(Date=new_rows['Date'].astype(str).str[:10])
+
+    # Rows of the last date may already be in the tail
+    seen = pd.MultiIndex.from_frame(tail[['Player', 'Date']])
+    new_rows = new_rows[~pd.MultiIndex.from_frame(new_rows[['Player', 'Date']]).isin(seen)]
+    if new_rows.empty:
+        print(f"No new box scores since {last_date}.")
+        return new_rows
+
+    df = pd.concat([tail, new_rows], ignore_index=True).sort_values(by='Date', kind='stable').reset_index(drop=True)
+    # A game on the last date may have gained players, so every game with a new row is rebuilt whole
+    features = player_team_features(df, games=game_sides(new_rows))
+    prepend_games(features, output_file, float32_columns=player_feature_columns)
+    save_tail(df, output_file)
+
+    print(f"Added player features of {len(features)} games to {output_file}.")
+    return features
+
+def main():
+    parser = argparse.ArgumentParser(description="Build player_features.csv: minutes-weighted team features from per-player rolling averages.")
+    parser.add_argument("--input", default="player_boxscores.csv", help="player box scores")
+    parser.add_argument("--output", default="player_features.csv", help="feature table to write")
+    parser.add_argument("--incremental", action="store_true", help="only add the games of dates since the last build")
+    args = parser.parse_args()
+
+    if args.incremental:
+        update_player_features(args.input, args.output)
+    else:
+        write_player_features(args.input, args.output)
+
+if __name__ == "__main__":
+    main()
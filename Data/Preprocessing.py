@@ -1,125 +1,200 @@
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+
 import pandas as pd
 
-def combine_game_stats(input_file, output_file):
-    # Read the CSV file
-    df = pd.read_csv(input_file)
-    
-    # Extract home and away games and make explicit copies to avoid SettingWithCopyWarning
-    home_games = df[~df['Opponent'].str.contains('@')].copy()
-    away_games = df[df['Opponent'].str.contains('@')].copy()
-    
-    # Function to standardize matchup format
-    def get_matchup_key(row):
-        if '@' in row['Opponent']:
-            away_team = row['Team']
-            home_team = row['Opponent'].split(' @ ')[1]
-        else:
-            home_team = row['Team']
-            away_team = row['Opponent'].split(' vs. ')[1]
-        return f"{home_team}_{away_team}_{row['Date']}"
-    
-    # Add matchup key using .loc to avoid SettingWithCopyWarning
-    home_games.loc[:, 'matchup_key'] = home_games.apply(get_matchup_key, axis=1)
-    away_games.loc[:, 'matchup_key'] = away_games.apply(get_matchup_key, axis=1)
-    
-    # Group by matchup_key and aggregate stats, excluding grouping columns
-# Group by matchup_key and aggregate stats
-    def aggregate_team_stats(group):
-        return pd.Series({
-            'Points': group['Points'].sum(),
-            'FGA': group['FGA'].sum(),
-            'FGM': group['FGM'].sum(),
-            '3PA': group['3PA'].sum(),
-            '3PM': group['3PM'].sum(),
-            'FTA': group['FTA'].sum(),
-            'FTM': group['FTM'].sum(),
-            'OREB': group['OREB'].sum(),
-            'DREB': group['DREB'].sum(),
-            'REB': group['REB'].sum(),
-            'AST': group['AST'].sum(),
-            'TO': group['TO'].sum(),
-            'STL': group['STL'].sum(),
-            'BLK': group['BLK'].sum(),
-            'PF': group['PF'].sum(),
-            'Team': group['Team'].iloc[0],
-            'Date': group['Date'].iloc[0]
-        })
-
-    # Group by 'matchup_key' and apply aggregation, excluding 'matchup_key'
-    home_stats = home_games.groupby('matchup_key').apply(lambda group: aggregate_team_stats(group.drop(columns=['matchup_key']))).reset_index()
-    away_stats = away_games.groupby('matchup_key').apply(lambda group: aggregate_team_stats(group.drop(columns=['matchup_key']))).reset_index()
-
-    
+from Instrumentation import stage
+from Storage import prepend_typed_copy, save_typed_copy, typed_copy_current
+
+# Counting stats summed from player rows into team totals
+stat_columns = [
+    'Points', 'FGA', 'FGM', '3PA', '3PM', 'FTA', 'FTM',
+    'OREB', 'DREB', 'REB', 'AST', 'TO', 'STL', 'BLK', 'PF'
+]
+
+# Output column order of game_stats.csv
+team_columns = [
+    'FGA', 'FGM', 'FG%', '3PA', '3PM', '3P%', 'FTA', 'FTM', 'FT%',
+    'OREB', 'DREB', 'REB', 'AST', 'TO', 'STL', 'BLK', 'PF', 'Points'
+]
+final_columns = (
+    ['Date', 'Team_home'] + [f"{col}_home" for col in team_columns]
+    + ['Team_away'] + [f"{col}_away" for col in team_columns]
+    + ['Point_diff']
+)
+
+def aggregate_game_stats(df):
+    """
+    Collapse player box score rows into one row per game with home and away team totals.
+    """
+    # 'Opponent' reads "HOME vs. AWAY" for home players and "AWAY @ HOME" for away players
+    is_away = df['Opponent'].str.contains('@', regex=False).to_numpy()
+    opponent = df['Opponent'].str.split(r' @ | vs\. ', n=1, regex=True).str[1]
+
+    keys = pd.DataFrame({
+        'Date': df['Date'].astype(str),
+        'Team_home': opponent.where(is_away, df['Team']),
+        'Team_away': df['Team'].where(is_away, opponent),
+        'is_away': is_away,
+    })
+
+    # Sum every stat column for both sides of every game in a single pass
+    totals = df[stat_columns].groupby(
+        [keys['Date'], keys['Team_home'], keys['Team_away'], keys['is_away']]
+    ).sum()
+
     # Calculate field goal, 3-point, and free throw percentages
-    for stats_df in [home_stats, away_stats]:
-        stats_df['FG%'] = (stats_df['FGM'] / stats_df['FGA']).fillna(0)
-        stats_df['3P%'] = (stats_df['3PM'] / stats_df['3PA']).fillna(0)
-        stats_df['FT%'] = (stats_df['FTM'] / stats_df['FTA']).fillna(0)
-
-    # Merge home and away stats
-    combined_stats = pd.merge(
-        home_stats,
-        away_stats,
-        on='matchup_key',
-        suffixes=('_home', '_away')
-    )
-    
-    # Calculate Point_diff and drop Points_home and Points_away
+    totals['FG%'] = (totals['FGM'] / totals['FGA']).fillna(0)
+    totals['3P%'] = (totals['3PM'] / totals['3PA']).fillna(0)
+    totals['FT%'] = (totals['FTM'] / totals['FTA']).fillna(0)
+    totals = totals[team_columns]
+
+    # Self-join the home side against the away side of the same game
+    home_stats = totals.xs(False, level='is_away').add_suffix('_home')
+    away_stats = totals.xs(True, level='is_away').add_suffix('_away')
+    combined_stats = home_stats.join(away_stats, how='inner').reset_index()
+
     combined_stats['Point_diff'] = combined_stats['Points_home'] - combined_stats['Points_away']
-    
-    # Clean up and reorganize columns
-    final_columns = [
-        'Date_home',         # Will be renamed to "Date" below
-        'Team_home',
-        'FGA_home',
-        'FGM_home',
-        'FG%_home',
-        '3PA_home',
-        '3PM_home',
-        '3P%_home',
-        'FTA_home',
-        'FTM_home',
-        'FT%_home',
-        'OREB_home',
-        'DREB_home',
-        'REB_home',
-        'AST_home',
-        'TO_home',
-        'STL_home',
-        'BLK_home',
-        'PF_home',
-        'Points_home',
-
-        'Team_away',
-        'FGA_away',
-        'FGM_away',
-        'FG%_away',
-        '3PA_away',
-        '3PM_away',
-        '3P%_away',
-        'FTA_away',
-        'FTM_away',
-        'FT%_away',
-        'OREB_away',
-        'DREB_away',
-        'REB_away',
-        'AST_away',
-        'TO_away',
-        'STL_away',
-        'BLK_away',
-        'PF_away',
-        'Points_away',
-
-        'Point_diff'
-    ]
-
-    # Select relevant columns and rename 'Date_home' to 'Date'
+
     final_df = combined_stats[final_columns]
-    final_df = final_df.rename(columns={'Date_home': 'Date'})
-    final_df = final_df.sort_values(by=['Date', 'Team_home'], ascending=False)
-    
-    # Save to the output CSV file
-    final_df.to_csv(output_file, index=False)
+    return final_df.sort_values(by=['Date', 'Team_home'], ascending=False)
+
+def matchup_keys(games):
+    return (games['Team_home'] + '_' + games['Team_away'] + '_' + games['Date'].astype(str)).tolist()
+
+def watermark_file(output_file):
+    return os.path.splitext(output_file)[0] + '_watermark.json'
+
+def load_watermark(output_file):
+    path = watermark_file(output_file)
+    if not os.path.exists(path) or not os.path.exists(output_file):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_watermark(output_file, games):
+    # Only the keys on the latest date are needed, older dates are never re-read.
+    # games holds every game from the previous watermark date on, so the latest date is complete
+    last_date = games['Date'].max()
+    keys = matchup_keys(games[games['Date'] == last_date])
+    with open(watermark_file(output_file), 'w') as f:
+        json.dump({'last_date': last_date, 'matchup_keys': keys}, f, indent=2)
+
+def read_rows_since(input_file, since_date, block_size=1 << 16):
+    """
+    Read the rows of a date-sorted box score CSV whose Date is on or after since_date.
+    The file is scanned backwards from the end, so the cost depends on the number of new rows only.
+    """
+    with open(input_file, 'rb') as f:
+        header = f.readline().decode()
+        date_index = next(csv.reader([header])).index('Date')
+        data_start = f.tell()
+
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b''
+        while position > data_start:
+            read_size = min(block_size, position - data_start)
+            position -= read_size
+            f.seek(position)
+            tail = f.read(read_size) + tail
+            # The first line in the buffer may be cut off unless we reached the header
+            lines = tail.split(b'\n')
+            first_complete = lines[0] if position == data_start else lines[1] if len(lines) > 1 else b''
+            if first_complete and next(csv.reader([first_complete.decode()]))[date_index][:10] < since_date:
+                break
+
+    lines = tail.split(b'\n')
+    if position > data_start:
+        lines = lines[1:]
+    lines = [line.decode().rstrip('\r') for line in lines if line.strip()]
+    new_lines = [line for line in lines if next(csv.reader([line]))[date_index][:10] >= since_date]
+    return pd.read_csv(io.StringIO(header + '\n'.join(new_lines)))
+
+def prepend_games(new_games, output_file, float32_columns=()):
+    """
+    Merge new games into the top of a game_stats.csv that is sorted newest first.
+    Only the leading rows that share dates with the new games are parsed, the rest is copied as is.
+    The Arrow copy is updated the same way (with float32_columns as float32), so readers keep using it
+    after a daily update.
+    """
+    since_date = new_games['Date'].min()
+    was_current = typed_copy_current(output_file)
+    temp_file = output_file + '.tmp'
+    with open(output_file, newline='') as f:
+        header = f.readline()
+        head_lines = []
+        remainder = ''
+        for line in f:
+            if line.split(',', 1)[0] < since_date:
+                remainder = line
+                break
+            head_lines.append(line)
+
+        head = pd.read_csv(io.StringIO(header + ''.join(head_lines)), float_precision='round_trip')
+        head['Date'] = head['Date'].astype(str)
+        merged = pd.concat([new_games, head], ignore_index=True)
+        merged = merged.drop_duplicates(subset=['Date', 'Team_home', 'Team_away'], keep='first')
+        merged = merged.sort_values(by=['Date', 'Team_home'], ascending=False)
+
+        with open(temp_file, 'w', newline='') as out:
+            merged.to_csv(out, index=False)
+            out.write(remainder)
+            shutil.copyfileobj(f, out)
+    os.replace(temp_file, output_file)
+    prepend_typed_copy(merged, output_file, since_date, was_current, float32_columns=float32_columns)
+
+def combine_game_stats(input_file, output_file, incremental=False):
+    """
+    Aggregate player box scores into game_stats.csv.
+    With incremental=True, only games on or after the stored date watermark are aggregated and merged
+    into the existing output. The games of the watermark date itself are aggregated again and replace
+    the stored ones, since the scraper fetches that date again in case its stats were not final.
+    Falls back to a full rebuild when there is no watermark yet.
+    """
+    watermark = load_watermark(output_file) if incremental else None
+
+    if watermark is None:
+        # Read the CSV file
+        df = pd.read_csv(input_file)
+        with stage("combine_game_stats", rows_in=len(df)) as record:
+            final_df = aggregate_game_stats(df)
+            record.rows_out = len(final_df)
+
+        # Save to the output CSV file, plus a typed copy for the later stages
+        final_df.to_csv(output_file, index=False)
+        save_typed_copy(final_df, output_file)
+        save_watermark(output_file, final_df)
+        return final_df
+
+    df = read_rows_since(input_file, watermark['last_date'])
+    if df.empty:
+        print(f"No new box scores since {watermark['last_date']}.")
+        return df
+
+    with stage("combine_game_stats", rows_in=len(df)) as record:
+        new_games = aggregate_game_stats(df)
+        record.rows_out = len(new_games)
+    if new_games.empty:
+        print(f"No new games since {watermark['last_date']}.")
+        return new_games
+
+    # Games already stored are replaced by their new totals (prepend_games keeps the first copy)
+    prepend_games(new_games, output_file)
+    save_watermark(output_file, new_games)
+
+    seen = pd.Series(matchup_keys(new_games), index=new_games.index).isin(watermark['matchup_keys'])
+    print(f"Added {(~seen).sum()} new games to {output_file} and refreshed the {seen.sum()} of {watermark['last_date']}.")
+    return new_games
 
 # Usage example
-combine_game_stats('player_boxscores.csv', 'game_stats.csv')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate player box scores into game_stats.csv.")
+    parser.add_argument("--incremental", action="store_true", help="only add games newer than the stored watermark")
+    args = parser.parse_args()
+
+    combine_game_stats('player_boxscores.csv', 'game_stats.csv', incremental=args.incremental)
@@ -1,11 +1,10 @@
+import argparse
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-# Load the historical game stats data
-df = pd.read_csv("game_stats.csv", parse_dates=["Date"])
-
-# Sort by date to ensure correct chronological order
-df = df.sort_values(by=["Date"])
+from Instrumentation import stage
+from Storage import find_table, load_table, save_typed_copy
 
 # Define columns for which you want rolling averages
 home_stats_columns = [
@@ -22,83 +21,182 @@ away_stats_columns = [
 # Define rolling windows
 windows = [1, 5, 10, 20]
 
-# Calculate rolling averages for home team stats
-for window in windows:
-    for col in home_stats_columns:
-        df[f"{col}_avg_{window}"] = (
-            df.groupby("Team_home")[col]
-            .rolling(window, min_periods=1)
-            .mean()
-            .reset_index(level=0, drop=True)
-        )
-
-# Calculate rolling averages for away team stats
-for window in windows:
-    for col in away_stats_columns:
-        df[f"{col}_avg_{window}"] = (
-            df.groupby("Team_away")[col]
-            .rolling(window, min_periods=1)
-            .mean()
-            .reset_index(level=0, drop=True)
-        )
-
-# Define columns to keep (excluding Point_diff)
-columns_to_keep = ['Date', 'Team_home', 'Team_away', 'Point_diff']
-for window in windows:
-    for col in home_stats_columns + away_stats_columns:
-        columns_to_keep.append(f"{col}_avg_{window}")
-
-# Filter out unnecessary columns and save rolling averages to a new CSV
-df_rolling_averages = df[columns_to_keep].sort_values(by='Date', ascending=False)
-df_rolling_averages.to_csv("rolling_averages.csv", index=False)
-
-print("Saved data to rolling_averages.csv.")
-
-# --- Now, create testing data based on today's matchups ---
-
-# Load today's matchups file
-today_str = datetime.now().strftime("%Y-%m-%d")
-today_matchups_file = f"{today_str}_matchups.csv"
-df_today_matchups = pd.read_csv(today_matchups_file)
-
-# Initialize an empty list to store processed matchup data
-today_matchups_data = []
-
-# Loop through each matchup
-for _, matchup in df_today_matchups.iterrows():
-    home_team = matchup["Team_home"]
-    away_team = matchup["Team_away"]
-    game_date = matchup["Date"]
-
-    # Extract rolling averages for the home team from the historical data
-    home_data = df[(df["Team_home"] == home_team) & (df["Date"] < game_date)].iloc[-1]
-
-    # Extract rolling averages for the away team from the historical data
-    away_data = df[(df["Team_away"] == away_team) & (df["Date"] < game_date)].iloc[-1]
-
-    # Combine game information with rolling averages for both teams
-    game_data = {
-        "Date": game_date,
-        "Team_home": home_team,
-        "Team_away": away_team,
-    }
-
-    # Add home and away team stats for each rolling window
-    for window in windows:
-        for col in home_stats_columns:
-            game_data[f"{col}_avg_{window}"] = home_data[f"{col}_avg_{window}"]
-        for col in away_stats_columns:
-            game_data[f"{col}_avg_{window}"] = away_data[f"{col}_avg_{window}"]
-
-    # Append game data to the list
-    today_matchups_data.append(game_data)
-
-# Convert the list to a DataFrame
-df_today_matchups_processed = pd.DataFrame(today_matchups_data)
-
-# Save the processed data to a new CSV
-output_file = f"testing.csv"
-df_today_matchups_processed.to_csv(output_file, index=False)
-
-print(f"Saved today's matchups with rolling averages to {output_file}.")
+# Rolling feature columns in output order: every window, home stats then away stats
+feature_columns = [
+    f"{col}_avg_{window}"
+    for window in windows
+    for col in home_stats_columns + away_stats_columns
+]
 
+def load_game_stats(path="game_stats.csv"):
+    # Load the historical game stats data from its freshest stored copy
+    df = load_table(find_table(path))
+
+    # Sort by date to ensure correct chronological order
+    return df.sort_values(by=["Date"], kind="stable").reset_index(drop=True)
+
+def rolling_means(teams, values, windows):
+    """
+    Trailing means of every column of values over each team's own rows, for every window at once.
+    Rows are taken in their existing (chronological) order. Returns an array of shape
+    (rows, windows, columns); NaNs are skipped like pandas' rolling(window, min_periods=1).mean().
+    """
+    codes, _ = pd.factorize(teams)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    valid = ~np.isnan(values[order])
+    sorted_values = np.where(valid, values[order], 0)
+    rows = len(order)
+
+    # Counting stats are whole numbers, so differences of their cumulative sums are exact. They are
+    # moved in front of the other columns so every window is filled with slices, not fancy indexing
+    integral = np.all(sorted_values == np.round(sorted_values), axis=0)
+    column_order = np.argsort(~integral, kind="stable")
+    whole = integral.sum()
+    sorted_values, valid = sorted_values[:, column_order], valid[:, column_order]
+
+    # First row of each team's segment, so windows never reach into another team
+    row = np.arange(rows)
+    segment_start = np.zeros(rows, dtype=np.int64)
+    if rows:
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        segment_start[boundaries] = boundaries
+        segment_start = np.maximum.accumulate(segment_start)
+
+    sums = np.zeros((rows + 1, whole))
+    np.cumsum(sorted_values[:, :whole], axis=0, out=sums[1:])
+    # Without NaNs every column of a window counts the same rows
+    complete = valid.all()
+    if not complete:
+        counts = np.zeros((rows + 1, values.shape[1]), dtype=np.int64)
+        np.cumsum(valid, axis=0, out=counts[1:])
+
+    # Percentages would pick up rounding error from a long cumulative sum, so their windows are
+    # summed over lags instead, in extended precision so every window sum is correctly rounded
+    fractional = sorted_values[:, whole:].astype(np.longdouble)
+    lag_sums = np.zeros(fractional.shape, dtype=np.longdouble)
+    position = row - segment_start
+
+    # One contiguous block per window while filling, transposed to (rows, windows, columns) at the end
+    sorted_result = np.empty((len(windows), rows, values.shape[1]))
+    for lag in range(max(windows)):
+        lag_sums[lag:] += np.where((position[lag:] >= lag)[:, None], fractional[:rows - lag], 0)
+        if lag + 1 not in windows:
+            continue
+
+        start = np.maximum(row - lag, segment_start)
+        window_counts = (row - start + 1)[:, None] if complete else counts[1:] - counts[start]
+        means = sorted_result[windows.index(lag + 1)]
+        np.subtract(sums[1:], sums[start], out=means[:, :whole])
+        means[:, whole:] = lag_sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means /= window_counts
+        if not complete:
+            means[window_counts == 0] = np.nan
+
+    # Put the rows and columns back in their original order
+    result = np.empty((rows, len(windows), values.shape[1]))
+    result[order] = sorted_result.transpose(1, 0, 2)
+    if not integral.all():
+        result = result[:, :, np.argsort(column_order)]
+    return result
+
+def compute_rolling_features(df):
+    """
+    Build the rolling-average feature block for every game in df in a single pass per side.
+    df must already be in chronological order. Returns a DataFrame with feature_columns.
+    """
+    with stage("rolling windows", rows_in=len(df)) as record:
+        home = rolling_means(df["Team_home"].to_numpy(), df[home_stats_columns].to_numpy(dtype=np.float64), windows)
+        away = rolling_means(df["Team_away"].to_numpy(), df[away_stats_columns].to_numpy(dtype=np.float64), windows)
+        record.rows_out = len(home)
+
+    # (rows, windows, home + away stats) flattens to the same order as feature_columns
+    block = np.concatenate([home, away], axis=2).reshape(len(df), -1)
+    return pd.DataFrame(block, columns=feature_columns, index=df.index, copy=False)
+
+def build_rolling_averages(df):
+    """
+    Return Date, teams, Point_diff and every rolling feature for each game in chronological df.
+    """
+    features = compute_rolling_features(df)
+    return pd.concat([df[["Date", "Team_home", "Team_away", "Point_diff"]], features], axis=1)
+
+def lookup_side_features(df, matchups, side):
+    """
+    As-of join: for each matchup, the features of the latest game strictly before its date in
+    which its Team_{side} played on that side. Matchups must be sorted by Date.
+    """
+    team_column = f"Team_{side}"
+    columns = [col for col in feature_columns if f"_{side}_avg_" in col]
+    history = df[["Date", team_column] + columns].sort_values(by="Date", kind="stable")
+    # Team codes may be stored as categoricals; join on plain strings
+    features = pd.merge_asof(
+        matchups[["Date", team_column]].astype({team_column: str}),
+        history.astype({team_column: str}),
+        on="Date",
+        by=team_column,
+        allow_exact_matches=False,
+        direction="backward",
+    )
+    return features[columns]
+
+def build_testing_data(df, df_matchups):
+    """
+    Rolling features for any number of (Date, Team_home, Team_away) matchups, e.g. a day,
+    a week or the rest of the schedule, in one vectorized point-in-time lookup against df.
+    """
+    with stage("testing data", rows_in=len(df_matchups)) as record:
+        matchups = df_matchups[["Date", "Team_home", "Team_away"]].reset_index(drop=True)
+        lookup = matchups.assign(Date=pd.to_datetime(matchups["Date"]).astype(df["Date"].dtype))
+        lookup = lookup.sort_values(by="Date", kind="stable")
+
+        home = lookup_side_features(df, lookup, "home")
+        away = lookup_side_features(df, lookup, "away")
+        features = pd.concat([home, away], axis=1).set_axis(lookup.index)
+
+        # Back to the matchups' own order, with their original Date values
+        df_test = pd.concat([matchups, features.sort_index()[feature_columns]], axis=1)
+        record.rows_out = len(df_test)
+    return df_test
+
+def write_rolling_averages(games_file="game_stats.csv", output_file="rolling_averages.csv"):
+    """
+    Build the rolling averages for every game in games_file and save them newest first, plus a
+    typed copy. Returns the table in chronological order, as build_testing_data expects it.
+    """
+    df = load_game_stats(games_file)
+
+    # Filter out unnecessary columns and save rolling averages to a new CSV
+    df = build_rolling_averages(df)
+    df_rolling_averages = df.sort_values(by="Date", ascending=False, kind="stable")
+    df_rolling_averages.to_csv(output_file, index=False)
+    save_typed_copy(df_rolling_averages, output_file, float32_columns=feature_columns)
+
+    print(f"Saved data to {output_file}.")
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Build rolling_averages.csv and testing.csv from game_stats.csv.")
+    parser.add_argument("--matchups", help="matchups CSV to build testing data for (default: today's matchups)")
+    args = parser.parse_args()
+
+    df = write_rolling_averages("game_stats.csv", "rolling_averages.csv")
+
+    # --- Now, create testing data based on today's matchups ---
+
+    # Load today's matchups file, or any other slate of matchups
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    today_matchups_file = args.matchups or f"{today_str}_matchups.csv"
+    df_today_matchups = pd.read_csv(today_matchups_file)
+
+    df_today_matchups_processed = build_testing_data(df, df_today_matchups)
+
+    # Save the processed data to a new CSV
+    output_file = f"testing.csv"
+    df_today_matchups_processed.to_csv(output_file, index=False)
+
+    print(f"Saved today's matchups with rolling averages to {output_file}.")
+
+if __name__ == "__main__":
+    main()
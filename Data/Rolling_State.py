@@ -0,0 +1,253 @@
+import argparse
+import io
+import json
+import math
+import os
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Preprocessing import prepend_games
+from Storage import save_typed_copy
+from Rolling_Averages import build_rolling_averages, feature_columns, home_stats_columns, load_game_stats, windows
+
+# Stat names shared by both sides, e.g. "FGM" for FGM_home / FGM_away
+stat_names = [col[:-len("_home")] for col in home_stats_columns]
+sides = ["home", "away"]
+
+class RollingState:
+    """
+    Last max(windows) games and window sums for every team on each side (Team_home / Team_away).
+    Adding a finished game touches only its two teams, so updates cost the same however long the
+    history is, and each team's current rolling averages can be read without recomputing anything.
+    The teams' states from before the last date are kept too, so that date can be applied again.
+    """
+
+    def __init__(self, windows=windows):
+        self.windows = list(windows)
+        self.history = max(self.windows)
+        self.teams = {side: {} for side in sides}
+        self.last_date = None
+        # (side, team) -> its state before its game on last_date, None if it had no games before
+        self.before_last = {}
+
+    def _team(self, side, team):
+        if team not in self.teams[side]:
+            self.teams[side][team] = {
+                "games": deque(maxlen=self.history),
+                "sums": {window: [0.0] * len(stat_names) for window in self.windows},
+            }
+        return self.teams[side][team]
+
+    def update(self, game):
+        """
+        Add one finished game (a mapping with Date, Team_home, Team_away and the *_home / *_away stats).
+        """
+        date = str(game["Date"])[:10]
+        if date != self.last_date:
+            self.last_date, self.before_last = date, {}
+        for side in sides:
+            team = game[f"Team_{side}"]
+            if (side, team) not in self.before_last:
+                self.before_last[(side, team)] = self._copy_team(self.teams[side].get(team))
+            state = self._team(side, team)
+            state["games"].append([float(game[f"{stat}_{side}"]) for stat in stat_names])
+
+            # Re-add the at most max(windows) values in each window so the sums stay correctly rounded
+            recent = list(state["games"])
+            for window in self.windows:
+                state["sums"][window] = [math.fsum(column) for column in zip(*recent[-window:])]
+
+    def _copy_team(self, state):
+        if state is None:
+            return None
+        return {
+            "games": deque((list(game) for game in state["games"]), maxlen=self.history),
+            "sums": {window: list(sums) for window, sums in state["sums"].items()},
+        }
+
+    def rewind_last_date(self):
+        """
+        Undo the games of last_date, so they can be applied again with corrected stats. Returns that date.
+        """
+        for (side, team), state in self.before_last.items():
+            if state is None:
+                del self.teams[side][team]
+            else:
+                self.teams[side][team] = state
+        date, self.last_date, self.before_last = self.last_date, None, {}
+        return date
+
+    def team_averages(self, side, team):
+        """
+        Rolling averages for one team and side as an array of shape (windows, stats), NaN if it has no games.
+        """
+        state = self.teams[side].get(team)
+        averages = np.full((len(self.windows), len(stat_names)), np.nan)
+        if state is None or not state["games"]:
+            return averages
+        for i, window in enumerate(self.windows):
+            averages[i] = np.array(state["sums"][window]) / min(window, len(state["games"]))
+        return averages
+
+    def matchup_features(self, home_team, away_team):
+        """
+        Feature values in feature_columns order for home_team hosting away_team after the games seen so far.
+        """
+        home = self.team_averages("home", home_team)
+        away = self.team_averages("away", away_team)
+        return np.concatenate([home, away], axis=1).ravel()
+
+    @staticmethod
+    def _team_to_dict(state):
+        if state is None:
+            return None
+        return {
+            "games": list(state["games"]),
+            "sums": {str(window): sums for window, sums in state["sums"].items()},
+        }
+
+    def _team_from_dict(self, data):
+        if data is None:
+            return None
+        return {
+            "games": deque(data["games"], maxlen=self.history),
+            "sums": {int(window): sums for window, sums in data["sums"].items()},
+        }
+
+    def to_dict(self):
+        return {
+            "windows": self.windows,
+            "last_date": self.last_date,
+            "teams": {
+                side: {team: self._team_to_dict(state) for team, state in teams.items()}
+                for side, teams in self.teams.items()
+            },
+            "before_last": [[side, team, self._team_to_dict(state)] for (side, team), state in self.before_last.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["windows"])
+        state.last_date = data["last_date"]
+        for side, teams in data["teams"].items():
+            for team, team_state in teams.items():
+                state.teams[side][team] = state._team_from_dict(team_state)
+        # States saved before the last date could be rewound have none; refresh_rolling_averages rebuilds them
+        if "before_last" in data:
+            state.before_last = {(side, team): state._team_from_dict(team_state)
+                                 for side, team, team_state in data["before_last"]}
+        else:
+            state.before_last = None
+        return state
+
+    def save(self, path):
+        temp_file = path + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_game_stats(cls, df):
+        """
+        Replay a chronologically sorted game_stats DataFrame into a fresh state.
+        """
+        state = cls()
+        for game in df.to_dict("records"):
+            state.update(game)
+        return state
+
+def read_games_since(games_file, since_date):
+    """
+    Read the games on or after since_date from the top of a newest-first game_stats.csv.
+    """
+    with open(games_file, newline="") as f:
+        header = f.readline()
+        lines = []
+        for line in f:
+            if line.split(",", 1)[0] < since_date:
+                break
+            lines.append(line)
+    df = pd.read_csv(io.StringIO(header + "".join(lines)), float_precision="round_trip")
+    return df.iloc[::-1].reset_index(drop=True)
+
+def update_rolling_state(state, games_file="game_stats.csv", output_file="rolling_averages.csv"):
+    """
+    Feed the games of games_file from the state's last date on into the state and prepend their rows
+    to the rolling averages file and its typed copy, replacing the rows already there. The last date's
+    games are applied again from the state before them, since their stats may have been corrected
+    since. Returns the new rows.
+    """
+    games = read_games_since(games_file, state.rewind_last_date())
+
+    rows = []
+    for game in games.to_dict("records"):
+        # A game's own stats count towards its rolling averages, same as the full rebuild
+        state.update(game)
+        rows.append(state.matchup_features(game["Team_home"], game["Team_away"]))
+
+    new_rows = games[["Date", "Team_home", "Team_away", "Point_diff"]].reset_index(drop=True)
+    new_rows = pd.concat([new_rows, pd.DataFrame(rows, columns=feature_columns)], axis=1)
+    if not new_rows.empty:
+        prepend_games(new_rows, output_file, float32_columns=feature_columns)
+    return new_rows
+
+def build_testing_data_from_state(state, df_matchups):
+    """
+    Rolling features for upcoming matchups straight from the state, which must only contain earlier games.
+    """
+    features = [
+        state.matchup_features(home_team, away_team)
+        for home_team, away_team in zip(df_matchups["Team_home"], df_matchups["Team_away"])
+    ]
+    df_features = pd.DataFrame(features, columns=feature_columns, index=df_matchups.index)
+    return pd.concat([df_matchups[["Date", "Team_home", "Team_away"]], df_features], axis=1)
+
+def refresh_rolling_averages(state_file="rolling_state.json", games_file="game_stats.csv",
+                             output_file="rolling_averages.csv", rebuild=False):
+    """
+    Bring output_file up to date with games_file through the persisted state: only the games from
+    its last date on are applied. Rebuilds the state and output_file from the full history when either
+    is missing, the state cannot rewind its last date, or rebuild is set. Returns the state, saved to
+    state_file.
+    """
+    state = None if rebuild or not os.path.exists(state_file) else RollingState.load(state_file)
+    if state is None or state.before_last is None or not os.path.exists(output_file):
+        df = load_game_stats(games_file)
+        df_rolling_averages = build_rolling_averages(df).sort_values(by="Date", ascending=False, kind="stable")
+        df_rolling_averages.to_csv(output_file, index=False)
+        save_typed_copy(df_rolling_averages, output_file, float32_columns=feature_columns)
+        state = RollingState.from_game_stats(df)
+        print(f"Rebuilt rolling state from {len(df)} games.")
+    else:
+        since = state.last_date
+        new_rows = update_rolling_state(state, games_file, output_file)
+        print(f"Updated {len(new_rows)} games of {output_file} from {since} on.")
+    state.save(state_file)
+    return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Update rolling_averages.csv and testing.csv from the per-team rolling state.")
+    parser.add_argument("--state", default="rolling_state.json", help="persisted rolling state")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the state and rolling_averages.csv from the full history")
+    args = parser.parse_args()
+
+    state = refresh_rolling_averages(args.state, rebuild=args.rebuild)
+
+    # Load today's matchups file
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    df_today_matchups = pd.read_csv(f"{today_str}_matchups.csv")
+
+    df_testing = build_testing_data_from_state(state, df_today_matchups)
+    df_testing.to_csv("testing.csv", index=False)
+    print("Saved today's matchups with rolling averages to testing.csv.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# pyarrow is only needed for the typed formats; CSV works without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+team_columns = ["Team_home", "Team_away"]
+arrow_extensions = (".arrow", ".feather")
+parquet_extensions = (".parquet",)
+
+def _require_pyarrow(path):
+    if pa is None:
+        raise ImportError(f"pyarrow is required to read or write {path}; install it or use a .csv path")
+
+def typed_frame(df, float32_columns=()):
+    """
+    Dates as dates, team codes as categoricals, whole-number columns as the smallest integer type and
+    float32_columns as float32. Other float columns (e.g. shooting percentages) keep full precision.
+    """
+    df = df.copy()
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"])
+    for col in df.columns:
+        if col in team_columns:
+            df[col] = df[col].astype("category")
+        elif col in float32_columns:
+            df[col] = df[col].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+def to_arrow(df, float32_columns=()):
+    table = pa.Table.from_pandas(typed_frame(df, float32_columns), preserve_index=False)
+    if "Date" in table.column_names:
+        index = table.column_names.index("Date")
+        table = table.set_column(index, "Date", table.column("Date").cast(pa.date32()))
+    return table
+
+def save_table(df, path, float32_columns=(), csv_export=False):
+    """
+    Write a pipeline table. The format follows the extension: .arrow/.feather is an uncompressed Arrow IPC
+    file that can be memory-mapped, .parquet is compressed columnar storage, .csv is plain text.
+    With csv_export, a .csv copy is written next to a typed table.
+    """
+    base, ext = os.path.splitext(path)
+    if ext == ".csv":
+        df.to_csv(path, index=False)
+        return
+
+    _require_pyarrow(path)
+    table = to_arrow(df, float32_columns)
+    temp_file = path + ".tmp"
+    if ext in arrow_extensions:
+        with pa.OSFile(temp_file, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    elif ext in parquet_extensions:
+        pq.write_table(table, temp_file)
+    else:
+        raise ValueError(f"Unsupported table format: {path}")
+    os.replace(temp_file, path)
+
+    if csv_export:
+        df.to_csv(base + ".csv", index=False)
+
+def save_typed_copy(df, csv_path, float32_columns=()):
+    """
+    Write an Arrow copy next to a CSV the pipeline has just written, when pyarrow is installed.
+    The rolling feature tables store their features as float32 here; that copy is what find_table hands
+    the model, and the feature dtypes are part of the training fingerprint.
+    """
+    if pa is not None:
+        save_table(df, os.path.splitext(csv_path)[0] + ".arrow", float32_columns=float32_columns)
+
+def typed_copy_current(csv_path):
+    """
+    Whether the Arrow copy of csv_path exists and was written no earlier than the CSV.
+    """
+    arrow_path = os.path.splitext(csv_path)[0] + ".arrow"
+    return (pa is not None and os.path.exists(arrow_path) and os.path.exists(csv_path)
+            and os.path.getmtime(arrow_path) >= os.path.getmtime(csv_path))
+
+def prepend_typed_copy(head, csv_path, since_date, was_current, float32_columns=()):
+    """
+    Bring the Arrow copy of a newest-first CSV up to date after the CSV's rows from since_date on
+    were replaced by head. The older rows come from the memory-mapped copy itself, so nothing is
+    parsed; a copy that was already missing or stale (was_current False) is rebuilt from the CSV once.
+    float32_columns are stored as in save_typed_copy.
+    """
+    if pa is None:
+        return
+    if was_current:
+        older = load_table(os.path.splitext(csv_path)[0] + ".arrow")
+        older = older[older["Date"] < pd.Timestamp(since_date)]
+        # Team codes are categoricals in the copy and text in head; typed_frame makes them categoricals again
+        older = older.astype({col: str for col in team_columns if col in older.columns})
+        df = pd.concat([head.assign(Date=pd.to_datetime(head["Date"])), older], ignore_index=True)
+    else:
+        df = load_table(csv_path)
+    save_typed_copy(df, csv_path, float32_columns=float32_columns)
+
+def load_table(path, columns=None, memory_map=True):
+    """
+    Read a pipeline table, optionally only some columns. Arrow IPC files are memory-mapped, so numeric
+    columns are read from the page cache without copying or parsing, in the types they were stored as.
+    """
+    ext = os.path.splitext(path)[1]
+    if ext == ".csv":
+        header = pd.read_csv(path, nrows=0).columns
+        parse_dates = ["Date"] if "Date" in header and (columns is None or "Date" in columns) else False
+        df = pd.read_csv(path, usecols=columns, parse_dates=parse_dates, float_precision="round_trip")
+        if parse_dates:
+            df["Date"] = df["Date"].astype("datetime64[ns]")
+        return df
+
+    _require_pyarrow(path)
+    if ext in arrow_extensions:
+        source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    elif ext in parquet_extensions:
+        table = pq.read_table(path, columns=columns, memory_map=memory_map)
+    else:
+        raise ValueError(f"Unsupported table format: {path}")
+    df = table.to_pandas(date_as_object=False, split_blocks=True)
+    if "Date" in df.columns:
+        df["Date"] = df["Date"].astype("datetime64[ns]")
+    return df
+
+def find_table(path):
+    """
+    Return the freshest stored copy of a table, preferring typed formats over CSV. A typed copy older
+    than the CSV (e.g. after an incremental CSV update) is ignored. Falls back to path itself.
+    """
+    base = os.path.splitext(path)[0]
+    csv_path = base + ".csv"
+    csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else -1
+    if pa is not None:
+        for ext in arrow_extensions + parquet_extensions:
+            candidate = base + ext
+            if os.path.exists(candidate) and os.path.getmtime(candidate) >= csv_mtime:
+                return candidate
+    return csv_path if csv_mtime >= 0 else path
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pipeline tables between CSV, Arrow and Parquet.")
+    parser.add_argument("source", help="table to read (.csv, .arrow, .feather or .parquet)")
+    parser.add_argument("destination", help="table to write (.csv, .arrow, .feather or .parquet)")
+    parser.add_argument("--float32", action="store_true", help="store rolling-average feature columns as float32")
+    args = parser.parse_args()
+
+    df = load_table(args.source)
+    float32_columns = [col for col in df.columns if "_avg_" in col] if args.float32 else ()
+    save_table(df, args.destination, float32_columns=float32_columns)
+    print(f"Saved {len(df)} rows to {args.destination}.")
+
+if __name__ == "__main__":
+    main()
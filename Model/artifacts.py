@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import joblib
+import pandas as pd
+import sklearn
+
+# Fitted pipelines are stored next to ./Predictions, one joblib file plus a JSON description each
+artifact_dir = "./Models"
+
+def training_fingerprint(X_train, y_train, params):
+    """
+    Content hash of the training matrix, target and hyperparameters. Any change to the data, the
+    feature columns, their dtypes (e.g. the float32 typed copy against the float64 CSV) or the
+    parameters gives a new fingerprint and therefore a refit.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"features": list(X_train.columns), "params": params,
+                              "dtypes": [str(dtype) for dtype in X_train.dtypes], "target_dtype": str(y_train.dtype)},
+                             sort_keys=True).encode())
+    digest.update(pd.util.hash_pandas_object(X_train, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y_train, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def latest_file(target="Point_diff"):
+    # Point_diff keeps the original pointer; every other target gets its own
+    name = "latest.json" if target == "Point_diff" else f"latest_{target}.json"
+    return os.path.join(artifact_dir, name)
+
+def artifact_paths(fingerprint):
+    base = os.path.join(artifact_dir, f"model_{fingerprint[:16]}")
+    return base + ".joblib", base + ".json"
+
+def save_artifact(model, feature_columns, fingerprint, params, target="Point_diff", training_rows=None):
+    os.makedirs(artifact_dir, exist_ok=True)
+    model_path, metadata_path = artifact_paths(fingerprint)
+    metadata = {
+        "fingerprint": fingerprint,
+        "params": params,
+        "target": target,
+        "feature_columns": list(feature_columns),
+        "training_rows": training_rows,
+        "sklearn_version": sklearn.__version__,
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    joblib.dump(model, model_path)
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # Point the predict-only path at the newest artifact for this target
+    with open(latest_file(target), "w") as f:
+        json.dump({"fingerprint": fingerprint}, f)
+    return metadata
+
+def load_artifact(fingerprint=None, target="Point_diff"):
+    """
+    Load a fitted pipeline and its metadata, by fingerprint or the latest one saved for target.
+    Returns (None, None) when there is no such artifact.
+    """
+    if fingerprint is None:
+        latest_path = latest_file(target)
+        if not os.path.exists(latest_path):
+            return None, None
+        with open(latest_path) as f:
+            fingerprint = json.load(f)["fingerprint"]
+
+    model_path, metadata_path = artifact_paths(fingerprint)
+    if not (os.path.exists(model_path) and os.path.exists(metadata_path)):
+        return None, None
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    if metadata["sklearn_version"] != sklearn.__version__:
+        print(f"Artifact {fingerprint[:16]} was saved with scikit-learn {metadata['sklearn_version']}; refitting.")
+        return None, None
+    return joblib.load(model_path), metadata
+
+def check_schema(df, metadata, ignore=()):
+    """
+    Fail fast when a table to score does not carry exactly the feature columns the model was trained on
+    (columns in ignore, such as game identifiers, are allowed). Returns the features in training order.
+    """
+    expected = metadata["feature_columns"]
+    missing = [col for col in expected if col not in df.columns]
+    unexpected = [col for col in df.columns if col not in expected and col not in ignore]
+    if missing or unexpected:
+        raise ValueError(
+            f"Columns do not match model {metadata['fingerprint'][:16]}: "
+            f"missing {missing}, unexpected {unexpected}"
+        )
+    return df[expected]
@@ -0,0 +1,38 @@
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import NuSVR
+
+# Default hyperparameters for each regression backend
+default_params = {
+    # Exact RBF kernel; fit cost grows ~quadratically to cubically with training rows and,
+    # with nu=.9, nearly every row becomes a support vector that prediction has to visit
+    "nusvr": {"C": 10, "nu": .9, "gamma": "scale"},
+    # Approximate RBF kernel: a fixed number of landmark features and a linear model on top,
+    # so fit is linear in training rows and prediction cost does not grow with them.
+    # gamma=None is 1 / n_features, the same as NuSVR's "scale" on standardized features.
+    "nystroem": {"n_components": 500, "gamma": None, "alpha": 10.0},
+    # Histogram gradient boosting, the GBM the README describes
+    "hist_gbm": {"max_iter": 300, "learning_rate": 0.05, "max_leaf_nodes": 15, "l2_regularization": 1.0},
+}
+
+def make_model(backend="nusvr", params=None):
+    """
+    Build an unfitted regression pipeline for one of the backends in default_params.
+    params override the backend's defaults.
+    """
+    if backend not in default_params:
+        raise ValueError(f"Unknown backend {backend!r}; choose from {sorted(default_params)}")
+    params = {**default_params[backend], **(params or {})}
+
+    if backend == "nusvr":
+        return make_pipeline(StandardScaler(), NuSVR(**params))
+    if backend == "nystroem":
+        return make_pipeline(
+            StandardScaler(),
+            Nystroem(kernel="rbf", gamma=params["gamma"], n_components=params["n_components"], random_state=0),
+            Ridge(alpha=params["alpha"]),
+        )
+    return HistGradientBoostingRegressor(**params, random_state=0)
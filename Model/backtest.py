@@ -0,0 +1,130 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+from Rolling_Averages import build_testing_data
+from Storage import find_table, load_table
+from backends import default_params, make_model
+from model import id_columns, model_features, target
+from tuning import load_tuned_params
+
+# Training and validation matrices shared with the worker processes, sent once per worker instead of once per block
+_shared = {}
+
+# About three regular seasons of games: refits stay a constant size instead of growing with the history
+default_window = 3 * 1230
+
+def _init_worker(X_train, y, dates, X_validation, backend, params):
+    _shared.update(X_train=X_train, y=y, dates=dates, X_validation=X_validation, backend=backend, params=params)
+
+def refit_blocks(dates, first_date, refit_every):
+    """
+    Group the game dates from first_date on into blocks of refit_every dates. Every block is
+    predicted by one model trained on the games before the block's first date.
+    """
+    game_dates = np.unique(dates[dates >= first_date])
+    return [game_dates[i:i + refit_every] for i in range(0, len(game_dates), refit_every)]
+
+def run_block(block_dates, window):
+    """
+    Fit on the games before the block (the latest `window` of them, if set) and predict the
+    block's games from their pre-game features. Returns (row indices, predictions).
+    """
+    X_train, y, dates, X_validation = _shared["X_train"], _shared["y"], _shared["dates"], _shared["X_validation"]
+    train_rows = np.flatnonzero(dates < block_dates[0])
+    if window:
+        train_rows = train_rows[-window:]
+    test_rows = np.flatnonzero((dates >= block_dates[0]) & (dates <= block_dates[-1]))
+
+    # Games where a team has no earlier game on that side have no pre-game features to predict from
+    test_rows = test_rows[~np.isnan(X_validation[test_rows]).any(axis=1)]
+    if len(test_rows) == 0:
+        return test_rows, np.empty(0)
+
+    model = make_model(_shared["backend"], _shared["params"])
+    model.fit(X_train[train_rows], y[train_rows])
+    return test_rows, model.predict(X_validation[test_rows])
+
+def backtest(df, backend="nusvr", params=None, start=None, min_train=500, refit_every=7, window=default_window,
+             n_jobs=None, features=None):
+    """
+    Walk forward over the game history: for every game date, predict that day's games with a model
+    trained only on earlier games, using the features known before tip-off. Models are refit every
+    refit_every game dates rather than daily, each on the latest `window` games (0 or None: the whole
+    history, which makes every refit slower than the last), and blocks run in parallel in a process pool.
+    Only the given features are used (default: all). Returns one row per predicted game with the
+    predicted and actual Point_diff.
+    """
+    df = df.dropna().sort_values(by="Date", kind="stable").reset_index(drop=True)
+    feature_cols = features or [col for col in df.columns if col not in id_columns + [target]]
+    X_train = df[feature_cols].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+    dates = df["Date"].to_numpy()
+
+    # Point-in-time features for every game, computed once for the whole history
+    X_validation = build_testing_data(df, df[id_columns])[feature_cols].to_numpy(dtype=np.float64)
+
+    # Start once enough games have been played to train on
+    first_date = dates[min(min_train, len(dates) - 1)]
+    if start is not None:
+        first_date = max(first_date, np.datetime64(pd.Timestamp(start)))
+    blocks = refit_blocks(dates, first_date, refit_every)
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(X_train, y, dates, X_validation, backend, params)) as pool:
+        results = list(pool.map(run_block, blocks, [window] * len(blocks)))
+
+    rows = np.concatenate([test_rows for test_rows, _ in results]).astype(int)
+    predicted = np.concatenate([y_pred for _, y_pred in results])
+    out = df.loc[rows, id_columns].reset_index(drop=True)
+    out["Predicted_Point_diff"] = predicted
+    out[target] = y[rows]
+    return out
+
+def summarize(results):
+    errors = results["Predicted_Point_diff"] - results[target]
+    return {
+        "games": len(results),
+        "dates": results["Date"].nunique(),
+        "mae": errors.abs().mean(),
+        "rmse": np.sqrt((errors ** 2).mean()),
+        # Share of games where the predicted winner won
+        "winner_accuracy": (np.sign(results["Predicted_Point_diff"]) == np.sign(results[target])).mean(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the model over past game dates.")
+    parser.add_argument("--data", default="rolling_averages.csv", help="rolling averages table")
+    parser.add_argument("--backend", choices=sorted(default_params), default="nusvr", help="regression backend")
+    parser.add_argument("--start", help="first date to predict (YYYY-MM-DD)")
+    parser.add_argument("--min-train", type=int, default=500, help="games to train on before the first prediction")
+    parser.add_argument("--refit-every", type=int, default=7, help="game dates predicted by each refit")
+    parser.add_argument("--window", type=int, default=default_window,
+                        help=f"train on at most this many of the latest games, 0 for all (default: {default_window})")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--all-features", action="store_true", help="use every feature, ignoring the list pruned by Correlation.py")
+    parser.add_argument("--output", default="./Predictions/backtest.csv", help="results table")
+    args = parser.parse_args()
+
+    df = load_table(find_table(args.data))
+    start = time.perf_counter()
+    results = backtest(df, backend=args.backend, params=load_tuned_params(args.backend), start=args.start,
+                       min_train=args.min_train, refit_every=args.refit_every, window=args.window, n_jobs=args.jobs,
+                       features=model_features(df, args.all_features))
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    results.to_csv(args.output, index=False)
+    summary = summarize(results)
+    print(f"Backtested {summary['games']} games on {summary['dates']} dates in {elapsed:.1f}s")
+    print(f"MAE {summary['mae']:.2f}, RMSE {summary['rmse']:.2f}, winner accuracy {summary['winner_accuracy']:.1%}")
+    print(f"Results saved to {args.output}.")
+
+if __name__ == "__main__":
+    main()
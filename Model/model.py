@@ -1,54 +1,187 @@
+import argparse
+import os
+import sys
+
+import numpy as np
 import pandas as pd
-from sklearn.svm import NuSVR
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import GridSearchCV
-
-# Load the training and testing data
-df_train = pd.read_csv("rolling_averages.csv")
-df_test = pd.read_csv("testing.csv")
-
-# Drop rows with missing values in the training dataset (optional: could fill with mean/median values)
-df_train = df_train.dropna()
-
-# Separate features and target for training data
-X_train = df_train.drop(columns=["Date", "Team_home", "Team_away", "Point_diff"])
-y_train = df_train["Point_diff"]
-
-# Use only the features from the testing data
-X_test = df_test.drop(columns=["Date", "Team_home", "Team_away"])
-
-regr = make_pipeline(
-    StandardScaler(),
-    NuSVR(C=10, nu=.9, gamma="scale")
-)
-
-# param_grid = {
-#     'nusvr__C': [0.1, 1, 10],
-#     'nusvr__nu': [0.1, 0.5, 0.9],
-#     'nusvr__gamma': ['scale', 'auto']
-# }
-
-# grid_search = GridSearchCV(regr, param_grid, cv=5)
-# grid_search.fit(X_train, y_train)
-# print("Best parameters:", grid_search.best_params_)
-
-regr.fit(X_train, y_train) 
-y_pred = regr.predict(X_test)
-
-# Create a DataFrame to display predicted point differentials for each matchup
-predictions_df = pd.DataFrame({
-    "Date": df_test["Date"],
-    "Team_home": df_test["Team_home"],
-    "Team_away": df_test["Team_away"],
-    "Predicted_Point_diff": y_pred
-})
-
-# Display the predictions
-print("\nPredicted Point Differentials for Today's Matchups:")
-print(predictions_df)
-
-# Optionally, save predictions to a new CSV file
-today = pd.Timestamp("today").strftime("%Y-%m-%d")
-predictions_df.to_csv(f"./Predictions/{today}_predictions.csv", index=False)
-print(f"Predicted data saved to {today}_predictions.csv.")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+from Correlation import load_selected_features
+from Daily_Matchups import matchups_between
+from Instrumentation import stage
+from Rolling_Averages import build_testing_data, feature_columns, load_game_stats
+from Storage import find_table, load_table
+from artifacts import check_schema, load_artifact, save_artifact, training_fingerprint
+from backends import default_params, make_model
+from tuning import load_tuned_params, save_tuned_params, tune
+
+# Columns that identify a game rather than describe it
+id_columns = ["Date", "Team_home", "Team_away"]
+target = "Point_diff"
+
+def model_features(df, all_features=False):
+    """
+    Feature columns of df to train on: the pruned list written by Correlation.py when there is one
+    (and all_features is not set), otherwise every column but the identifiers and the target.
+    """
+    columns = [col for col in df.columns if col not in id_columns + [target]]
+    selected = None if all_features else load_selected_features()
+    if selected is None:
+        return columns
+    return [col for col in columns if col in selected]
+
+def load_training_data(path="rolling_averages.csv", all_features=False):
+    df_train = load_table(find_table(path))
+
+    # Drop rows with missing values in the training dataset (optional: could fill with mean/median values)
+    df_train = df_train.dropna()
+
+    # Separate features and target for training data
+    X_train = df_train[model_features(df_train, all_features)]
+    y_train = df_train[target]
+    return X_train, y_train
+
+def fit_or_load(X_train, y_train, backend="nusvr", params=None, retrain=False):
+    """
+    Return a fitted pipeline and its metadata, reusing the saved artifact when the training data,
+    backend and hyperparameters have not changed since it was fitted. Without params, the last
+    tuned parameters for the backend are used, or its defaults if it was never tuned.
+    """
+    if params is None:
+        params = load_tuned_params(backend)
+    params = {"backend": backend, **default_params[backend], **(params or {})}
+    fingerprint = training_fingerprint(X_train, y_train, params)
+    if not retrain:
+        regr, metadata = load_artifact(fingerprint)
+        if regr is not None:
+            print(f"Loaded model {fingerprint[:16]} (training data unchanged).")
+            return regr, metadata
+
+    regr = make_model(backend, {key: value for key, value in params.items() if key != "backend"})
+    with stage("model fit", rows_in=len(X_train)) as record:
+        record.extra.update(backend=backend, features=X_train.shape[1])
+        regr.fit(X_train, y_train)
+    metadata = save_artifact(regr, X_train.columns, fingerprint, params, target=target, training_rows=len(X_train))
+    print(f"Fitted and saved model {fingerprint[:16]}.")
+    return regr, metadata
+
+def tune_backend(backend="nusvr", path="rolling_averages.csv", n_jobs=-1):
+    """
+    Search the backend's hyperparameters on time-series folds and store the best for fit_or_load.
+    """
+    df = load_table(find_table(path)).dropna().sort_values(by="Date", kind="stable").reset_index(drop=True)
+    X_train = df[model_features(df)]
+
+    # Validate on the features each game had before tip-off, as at prediction time
+    X_validation = build_testing_data(df, df[id_columns])[X_train.columns]
+
+    best_params, results = tune(
+        X_train.to_numpy(dtype=np.float64),
+        df[target].to_numpy(dtype=np.float64),
+        X_validation.to_numpy(dtype=np.float64),
+        df["Date"].to_numpy(),
+        backend=backend,
+        n_jobs=n_jobs,
+    )
+    final_round = results[results["round"] == results["round"].max()]
+    save_tuned_params(backend, best_params, float(final_round["mae"].min()))
+    return best_params
+
+def predict_matchups(regr, metadata, df_test):
+    # Use only the features the model was trained on, in the same order; features pruned
+    # before training may still be in the table
+    pruned = [col for col in feature_columns if col not in metadata["feature_columns"]]
+    X_test = check_schema(df_test, metadata, ignore=id_columns + pruned)
+    with stage("model predict", rows_in=len(X_test)) as record:
+        y_pred = regr.predict(X_test)
+        record.rows_out = len(y_pred)
+
+    # Create a DataFrame to display predicted point differentials for each matchup
+    return pd.DataFrame({
+        "Date": df_test["Date"],
+        "Team_home": df_test["Team_home"],
+        "Team_away": df_test["Team_away"],
+        "Predicted_Point_diff": y_pred
+    })
+
+def predict(start_date, end_date=None, backend="nusvr", schedule_file="2024-25_schedule.csv",
+            data="rolling_averages.csv", predict_only=False, all_features=False, retrain=False):
+    """
+    Predicted point differentials for every scheduled game from start_date through end_date
+    (a single day by default). Features for all games are looked up in one pass and scored in
+    one call on a single model: the latest saved one with predict_only, otherwise the model
+    for the current training data (fitted only if it has changed, or always with retrain).
+    """
+    return predict_games(matchups_between(start_date, end_date, schedule_file), backend, data, predict_only,
+                         all_features, retrain)
+
+def predict_games(matchups, backend="nusvr", data="rolling_averages.csv", predict_only=False, all_features=False,
+                  retrain=False):
+    """
+    Predicted point differentials for a table of (Date, Team_home, Team_away) matchups; see predict.
+    """
+    if matchups.empty:
+        return matchups.assign(Predicted_Point_diff=pd.Series(dtype=float))
+
+    if predict_only:
+        regr, metadata = load_artifact()
+        if regr is None:
+            raise FileNotFoundError("No saved model found; fit one without predict_only first.")
+    else:
+        X_train, y_train = load_training_data(data, all_features)
+        regr, metadata = fit_or_load(X_train, y_train, backend=backend, retrain=retrain)
+
+    df_test = build_testing_data(load_game_stats(data), matchups)
+    return predict_matchups(regr, metadata, df_test)
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict point differentials for the matchups in testing.csv, or for a date range of the schedule.")
+    parser.add_argument("--start", help="predict the scheduled games from this date (YYYY-MM-DD) instead of testing.csv")
+    parser.add_argument("--end", help="last date to predict with --start (default: the start date)")
+    parser.add_argument("--predict-only", action="store_true", help="score with the latest saved model without reading the training data")
+    parser.add_argument("--retrain", action="store_true", help="refit even if a model for the current training data exists")
+    parser.add_argument("--backend", choices=sorted(default_params), default="nusvr", help="regression backend to fit")
+    parser.add_argument("--tune", action="store_true", help="search the backend's hyperparameters before fitting")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel workers for --tune (default: all cores)")
+    parser.add_argument("--all-features", action="store_true", help="train on every feature, ignoring the list pruned by Correlation.py")
+    args = parser.parse_args()
+
+    if args.tune:
+        tune_backend(args.backend, n_jobs=args.jobs)
+
+    if args.start:
+        predictions_df = predict(args.start, args.end, backend=args.backend, predict_only=args.predict_only,
+                                 all_features=args.all_features, retrain=args.retrain)
+        end = args.end or args.start
+        output_file = f"./Predictions/{args.start}_{end}_predictions.csv"
+        print(predictions_df)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        predictions_df.to_csv(output_file, index=False)
+        print(f"Predicted {len(predictions_df)} games, saved to {output_file}.")
+        return
+
+    # Load the testing data
+    df_test = pd.read_csv("testing.csv")
+
+    if args.predict_only:
+        regr, metadata = load_artifact()
+        if regr is None:
+            sys.exit("No saved model found; run without --predict-only first.")
+    else:
+        X_train, y_train = load_training_data(all_features=args.all_features)
+        regr, metadata = fit_or_load(X_train, y_train, backend=args.backend, retrain=args.retrain)
+
+    predictions_df = predict_matchups(regr, metadata, df_test)
+
+    # Display the predictions
+    print("\nPredicted Point Differentials for Today's Matchups:")
+    print(predictions_df)
+
+    # Optionally, save predictions to a new CSV file
+    today = pd.Timestamp("today").strftime("%Y-%m-%d")
+    os.makedirs("./Predictions", exist_ok=True)
+    predictions_df.to_csv(f"./Predictions/{today}_predictions.csv", index=False)
+    print(f"Predicted data saved to {today}_predictions.csv.")
+
+if __name__ == "__main__":
+    main()
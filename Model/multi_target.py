@@ -0,0 +1,159 @@
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+from Daily_Matchups import matchups_between
+from Rolling_Averages import build_testing_data, feature_columns, load_game_stats
+from Storage import find_table, load_table
+from artifacts import check_schema, load_artifact, save_artifact, training_fingerprint
+from backends import default_params, make_model
+from model import id_columns, model_features
+from tuning import load_tuned_params
+
+# Fitted together: the margin and each side's score
+targets = ["Point_diff", "Points_home", "Points_away"]
+
+# Feature matrix of the worker processes, mapped from one file instead of sent to each of them
+_shared = {}
+
+def _init_worker(matrix_file, columns):
+    # A DataFrame view of the mapped pages (no copy), so the models know their feature names as model.py's do
+    _shared["X"] = pd.DataFrame(np.load(matrix_file, mmap_mode="r"), columns=columns, copy=False)
+
+def fit_target(target, y, backend, params):
+    """
+    Fit one target on the shared matrix. Returns (target, model, fit seconds, worker peak RSS in MB).
+    """
+    model = make_model(backend, params)
+    start = time.perf_counter()
+    model.fit(_shared["X"], y)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    return target, model, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def load_training_targets(path="rolling_averages.csv", games="game_stats.csv", all_features=False):
+    """
+    Features of every complete game with all targets: Point_diff from the rolling averages,
+    the team scores from game_stats.
+    """
+    df = load_table(find_table(path)).dropna()
+    scores = load_table(find_table(games))[id_columns + ["Points_home", "Points_away"]]
+    # Team codes may be categorical in one table and text in the other
+    keys = {"Team_home": str, "Team_away": str}
+    df = df.astype(keys).merge(scores.astype(keys), on=id_columns, how="inner", validate="one_to_one")
+    # The team scores are targets here, never features
+    features = [col for col in model_features(df, all_features) if col not in targets]
+    return df[features], df[targets]
+
+def fit_targets(X_train, Y, backend="nusvr", params=None, n_jobs=None, retrain=False):
+    """
+    One fitted model per target column of Y, with its metadata: {target: (model, metadata)}.
+    Targets whose training data and parameters are unchanged reuse their saved artifact; the rest
+    are fitted in parallel worker processes that all read one float32 memory-mapped copy of X_train.
+    """
+    if params is None:
+        params = load_tuned_params(backend)
+    params = {"backend": backend, **default_params[backend], **(params or {})}
+    model_params = {key: value for key, value in params.items() if key != "backend"}
+
+    models, fingerprints = {}, {}
+    for target in Y.columns:
+        # The target's name and the float32 training copy are part of what was fitted: a Point_diff model
+        # fitted here never stands in for model.py's float64 one, nor a target for another with equal values
+        fingerprints[target] = training_fingerprint(X_train, Y[target],
+                                                    {**params, "target": target, "matrix_dtype": "float32"})
+        if not retrain:
+            regr, metadata = load_artifact(fingerprints[target])
+            if regr is not None:
+                print(f"Loaded {target} model {fingerprints[target][:16]} (training data unchanged).")
+                models[target] = (regr, metadata)
+    pending = [target for target in Y.columns if target not in models]
+    if not pending:
+        return models
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_file = os.path.join(tmp, "features.npy")
+        np.save(matrix_file, X_train.to_numpy(dtype=np.float32))
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=min(n_jobs or os.cpu_count(), len(pending)), initializer=_init_worker,
+                                 initargs=(matrix_file, list(X_train.columns))) as pool:
+            futures = [pool.submit(fit_target, target, Y[target].to_numpy(dtype=np.float64), backend, model_params)
+                       for target in pending]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+    for target, regr, fit_time, peak_mb in results:
+        metadata = save_artifact(regr, X_train.columns, fingerprints[target], params, target=target,
+                                 training_rows=len(X_train))
+        models[target] = (regr, metadata)
+        print(f"Fitted {target} model {fingerprints[target][:16]} in {fit_time:.1f}s (worker peak RSS {peak_mb:.0f} MB).")
+    print(f"Fitted {len(pending)} targets in {elapsed:.1f}s.")
+    return models
+
+def load_latest_targets():
+    """
+    The latest saved model of every target, as fit_targets returns them.
+    """
+    models = {}
+    for target in targets:
+        regr, metadata = load_artifact(target=target)
+        if regr is None:
+            raise FileNotFoundError(f"No saved {target} model found; fit them without predict_only first.")
+        models[target] = (regr, metadata)
+    return models
+
+def predict_targets(models, df_test):
+    """
+    Every target's prediction for the matchups in df_test, plus the predicted total.
+    """
+    out = df_test[id_columns].copy()
+    for target, (regr, metadata) in models.items():
+        # Features pruned before training may still be in the table; any other extra column is an error
+        pruned = [col for col in feature_columns if col not in metadata["feature_columns"]]
+        X_test = check_schema(df_test, metadata, ignore=id_columns + pruned)
+        out[f"Predicted_{target}"] = regr.predict(X_test.astype(np.float32))
+    if "Points_home" in models and "Points_away" in models:
+        out["Predicted_Total"] = out["Predicted_Points_home"] + out["Predicted_Points_away"]
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit Point_diff, Points_home and Points_away models in parallel and predict them.")
+    parser.add_argument("--start", help="predict the scheduled games from this date (YYYY-MM-DD) instead of testing.csv")
+    parser.add_argument("--end", help="last date to predict with --start (default: the start date)")
+    parser.add_argument("--predict-only", action="store_true", help="score with the latest saved models")
+    parser.add_argument("--retrain", action="store_true", help="refit even if models for the current training data exist")
+    parser.add_argument("--backend", choices=sorted(default_params), default="nusvr", help="regression backend to fit")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per target, up to the number of cores)")
+    parser.add_argument("--all-features", action="store_true", help="train on every feature, ignoring the list pruned by Correlation.py")
+    args = parser.parse_args()
+
+    if args.predict_only:
+        models = load_latest_targets()
+    else:
+        X_train, Y = load_training_targets(all_features=args.all_features)
+        models = fit_targets(X_train, Y, backend=args.backend, n_jobs=args.jobs, retrain=args.retrain)
+
+    if args.start:
+        end = args.end or args.start
+        df_test = build_testing_data(load_game_stats("rolling_averages.csv"), matchups_between(args.start, end))
+        output_file = f"./Predictions/{args.start}_{end}_targets.csv"
+    else:
+        df_test = pd.read_csv("testing.csv")
+        output_file = f"./Predictions/{pd.Timestamp('today').strftime('%Y-%m-%d')}_targets.csv"
+
+    predictions_df = predict_targets(models, df_test)
+    print(predictions_df)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    predictions_df.to_csv(output_file, index=False)
+    print(f"Predicted {len(predictions_df)} games, saved to {output_file}.")
+
+if __name__ == "__main__":
+    main()
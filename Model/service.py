@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+from Rolling_Averages import build_testing_data, load_game_stats
+from Storage import find_table
+from artifacts import artifact_dir, load_artifact
+
+default_port = 8765
+
+class Snapshot:
+    """
+    Everything a query needs, built once per model artifact and rolling averages version: the
+    fitted pipeline, the full history for dated queries, and every team's latest home-side and
+    away-side features in the model's column order. Never modified after it is built, so queries
+    can read it while a newer one is being built.
+    """
+
+    def __init__(self, data):
+        self.regr, self.metadata = load_artifact()
+        if self.regr is None:
+            raise FileNotFoundError(f"No saved model in {artifact_dir}; fit one with model.py first.")
+        self.data_file = find_table(data)
+        self.df = load_game_stats(data)
+        self.features = self.metadata["feature_columns"]
+
+        # Latest features of each team on each side: what build_testing_data looks up for a game after the last one
+        self.home_positions = [i for i, col in enumerate(self.features) if "_home_avg_" in col]
+        self.away_positions = [i for i, col in enumerate(self.features) if "_away_avg_" in col]
+        home_columns = [self.features[i] for i in self.home_positions]
+        away_columns = [self.features[i] for i in self.away_positions]
+        self.home = self._latest(self.df, "Team_home", home_columns)
+        self.away = self._latest(self.df, "Team_away", away_columns)
+        self.version = {
+            "model": self.metadata["fingerprint"][:16],
+            "data": os.path.basename(self.data_file),
+            "last_game": str(self.df["Date"].max())[:10],
+            "loaded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    @staticmethod
+    def _latest(df, team_column, columns):
+        latest = df.groupby(df[team_column].astype(str), sort=False).tail(1)
+        return {team: row for team, row in zip(latest[team_column].astype(str), latest[columns].to_numpy(dtype=np.float64))}
+
+    def predict(self, games, date=None):
+        """
+        Predicted Point_diff for (home, away) pairs: from the latest features, or as of date
+        (features from games before it only) when date is given.
+        """
+        if date is not None:
+            matchups = pd.DataFrame(games, columns=["Team_home", "Team_away"]).assign(Date=date)
+            X = build_testing_data(self.df, matchups)[self.features]
+            if X.isna().any(axis=1).any():
+                raise KeyError(f"No games before {date} for some of the teams")
+        else:
+            X = np.empty((len(games), len(self.features)))
+            for row, (home, away) in enumerate(games):
+                if home not in self.home:
+                    raise KeyError(f"No home games for {home!r}")
+                if away not in self.away:
+                    raise KeyError(f"No away games for {away!r}")
+                X[row, self.home_positions] = self.home[home]
+                X[row, self.away_positions] = self.away[away]
+            X = pd.DataFrame(X, columns=self.features)
+        return self.regr.predict(X)
+
+def data_signature(data):
+    # Which stored copy of the rolling averages is freshest, and when it changed
+    path = find_table(data)
+    return path, os.path.getmtime(path)
+
+def model_signature():
+    latest = os.path.join(artifact_dir, "latest.json")
+    if not os.path.exists(latest):
+        return None
+    with open(latest) as f:
+        return json.load(f)["fingerprint"]
+
+class PredictionService:
+    """
+    Holds the current Snapshot and replaces it whole when a new model artifact or new rolling
+    averages land, so every query sees one consistent model and feature set.
+    """
+
+    def __init__(self, data="rolling_averages.csv", poll_interval=2.0):
+        self.data = data
+        self.poll_interval = poll_interval
+        self.signature = (model_signature(), data_signature(data))
+        self.snapshot = Snapshot(data)
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def reload(self, force=False):
+        """
+        Build a new snapshot if the model or the data changed (or force), then swap it in.
+        A failed build leaves the current snapshot serving. Returns whether it was swapped.
+        """
+        with self._reload_lock:
+            signature = (model_signature(), data_signature(self.data))
+            if signature == self.signature and not force:
+                return False
+            try:
+                snapshot = Snapshot(self.data)
+            except Exception as e:
+                print(f"Reload failed, still serving model {self.snapshot.version['model']}: {e}")
+                return False
+            self.snapshot, self.signature = snapshot, signature
+            print(f"Reloaded: model {snapshot.version['model']}, games through {snapshot.version['last_game']}.")
+            return True
+
+    def watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except OSError as e:
+                # The files may be mid-replace; try again on the next poll
+                print(f"Reload check failed: {e}")
+
+    def start_watching(self):
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def answer(self, games, date=None):
+            # One snapshot for the whole batch, even if a reload swaps it meanwhile
+            snapshot = service.snapshot
+            start = time.perf_counter()
+            try:
+                predictions = snapshot.predict(games, date)
+            except (KeyError, ValueError) as e:
+                self.send(400, {"error": str(e.args[0]) if e.args else str(e)})
+                return
+            self.send(200, {
+                "predictions": [{"home": home, "away": away, "predicted_point_diff": float(value)}
+                                for (home, away), value in zip(games, predictions)],
+                "date": date,
+                "version": snapshot.version,
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+            })
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/health":
+                self.send(200, service.snapshot.version)
+            elif url.path == "/predict" and "home" in query and "away" in query:
+                self.answer([(query["home"][0], query["away"][0])], query.get("date", [None])[0])
+            else:
+                self.send(404, {"error": "GET /health or /predict?home=XXX&away=YYY[&date=YYYY-MM-DD]"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path == "/reload":
+                self.send(200, {"reloaded": service.reload(force=True), "version": service.snapshot.version})
+                return
+            if url.path != "/predict":
+                self.send(404, {"error": "POST /predict or /reload"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                games = [(game["home"], game["away"]) for game in request["games"]]
+            except (ValueError, KeyError, TypeError):
+                self.send(400, {"error": 'expected {"games": [{"home": "XXX", "away": "YYY"}, ...], "date": optional}'})
+                return
+            self.answer(games, request.get("date"))
+    return Handler
+
+def serve(data="rolling_averages.csv", host="127.0.0.1", port=default_port, poll_interval=2.0):
+    service = PredictionService(data, poll_interval)
+    service.start_watching()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving model {service.snapshot.version['model']} on http://{host}:{server.server_port} "
+          f"(games through {service.snapshot.version['last_game']}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+def query(games, date=None, url=f"http://127.0.0.1:{default_port}"):
+    """
+    Client: predictions for a batch of (home, away) pairs from a running service.
+    """
+    body = json.dumps({"games": [{"home": home, "away": away} for home, away in games], "date": date}).encode()
+    request = urllib.request.Request(f"{url}/predict", data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        raise ValueError(json.load(e)["error"]) from None
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve point-differential predictions from memory, or query a running service.")
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="run the service (the default)")
+    serve_parser.add_argument("--data", default="rolling_averages.csv", help="rolling averages table")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=default_port, help="port to listen on")
+    serve_parser.add_argument("--poll", type=float, default=2.0, help="seconds between checks for a new model or data")
+    query_parser = subparsers.add_parser("query", help="ask a running service about matchups")
+    query_parser.add_argument("teams", nargs="+", help="HOME AWAY [HOME AWAY ...]")
+    query_parser.add_argument("--date", help="predict as of this date (YYYY-MM-DD) instead of from the latest games")
+    query_parser.add_argument("--url", default=f"http://127.0.0.1:{default_port}", help="service address")
+    args = parser.parse_args()
+
+    if args.command == "query":
+        if len(args.teams) % 2:
+            parser.error("teams come in HOME AWAY pairs")
+        try:
+            result = query(list(zip(args.teams[::2], args.teams[1::2])), args.date, args.url)
+        except ValueError as e:
+            # The service's own error, such as an unknown team or a date before any games
+            sys.exit(f"Query failed: {e}")
+        except urllib.error.URLError as e:
+            sys.exit(f"Could not reach the service at {args.url}: {e.reason}")
+        for game in result["predictions"]:
+            print(f"{game['home']} vs. {game['away']}: {game['predicted_point_diff']:+.1f}")
+        print(f"(model {result['version']['model']}, games through {result['version']['last_game']}, {result['ms']} ms)")
+        return
+
+    serve(getattr(args, "data", "rolling_averages.csv"), getattr(args, "host", "127.0.0.1"),
+          getattr(args, "port", default_port), getattr(args, "poll", 2.0))
+
+if __name__ == "__main__":
+    main()
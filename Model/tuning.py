@@ -0,0 +1,132 @@
+import itertools
+import json
+import math
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from artifacts import artifact_dir
+from backends import make_model
+
+# Search spaces per backend; the nusvr grid is the one model.py used to search with GridSearchCV
+param_grids = {
+    "nusvr": {"C": [0.1, 1, 10], "nu": [0.1, 0.5, 0.9], "gamma": ["scale", "auto"]},
+    "nystroem": {"n_components": [200, 500, 1000], "alpha": [1.0, 10.0, 100.0]},
+    "hist_gbm": {"learning_rate": [0.03, 0.1], "max_leaf_nodes": [7, 15, 31], "l2_regularization": [0.0, 1.0]},
+}
+
+tuned_params_file = os.path.join(artifact_dir, "tuned_params.json")
+
+def time_series_folds(dates, n_splits=5):
+    """
+    (train_rows, validation_rows) pairs split on whole game dates, so every fold validates on
+    games played after all of its training games and no date straddles the boundary.
+    """
+    unique_dates = np.unique(dates)
+    folds = []
+    for _, validation_dates in TimeSeriesSplit(n_splits=n_splits).split(unique_dates):
+        first, last = unique_dates[validation_dates[0]], unique_dates[validation_dates[-1]]
+        train_rows = np.flatnonzero(dates < first)
+        validation_rows = np.flatnonzero((dates >= first) & (dates <= last))
+        folds.append((train_rows, validation_rows))
+    return folds
+
+def prepare_folds(X_train, y, X_validation, folds):
+    """
+    Scale every fold once; all configurations and halving rounds then reuse the same matrices.
+    Validation rows whose pre-game features are unknown (a team's first game on a side) are dropped.
+    """
+    prepared = []
+    for train_rows, validation_rows in folds:
+        validation_rows = validation_rows[~np.isnan(X_validation[validation_rows]).any(axis=1)]
+        scaler = StandardScaler().fit(X_train[train_rows])
+        prepared.append((
+            scaler.transform(X_train[train_rows]),
+            y[train_rows],
+            scaler.transform(X_validation[validation_rows]),
+            y[validation_rows],
+        ))
+    return prepared
+
+def estimator_without_scaler(backend, params):
+    # Folds are already standardized, so drop the pipeline's own scaler
+    model = make_model(backend, params)
+    if isinstance(model, Pipeline) and isinstance(model.steps[0][1], StandardScaler):
+        return Pipeline(model.steps[1:])
+    return model
+
+def score_fold(estimator, X_train, y_train, X_validation, y_validation, rows):
+    # Halving rounds train on the most recent rows of the fold only
+    estimator = clone(estimator)
+    estimator.fit(X_train[-rows:], y_train[-rows:])
+    return mean_absolute_error(y_validation, estimator.predict(X_validation))
+
+def tune(X_train, y, X_validation, dates, backend="nusvr", n_splits=5, eta=3, min_rows=200, n_jobs=-1):
+    """
+    Successive-halving search over param_grids[backend] with time-series folds on game dates.
+
+    X_train holds the rows as the model is trained on them; X_validation holds the features known
+    before each game, which is what the model sees when it predicts. Every round fits all remaining
+    configurations on all folds in parallel, keeps the best 1/eta by mean absolute error and gives
+    the survivors eta times more of the most recent training rows. Returns (best_params, results).
+    """
+    grid = param_grids[backend]
+    candidates = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    folds = prepare_folds(X_train, y, X_validation, time_series_folds(dates, n_splits))
+    rounds = max(1, math.ceil(math.log(len(candidates), eta)))
+
+    results = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for round_number in range(rounds):
+            share = eta ** (round_number - rounds + 1)
+            fold_rows = [max(min(min_rows, len(fold[1])), int(len(fold[1]) * share)) for fold in folds]
+
+            start = time.perf_counter()
+            scores = parallel(
+                delayed(score_fold)(estimator_without_scaler(backend, params), *fold, rows)
+                for params in candidates
+                for fold, rows in zip(folds, fold_rows)
+            )
+            scores = np.array(scores).reshape(len(candidates), len(folds)).mean(axis=1)
+            print(f"Round {round_number + 1}/{rounds}: {len(candidates)} configurations, "
+                  f"{share:.0%} of training rows, {time.perf_counter() - start:.1f}s")
+
+            for params, score in zip(candidates, scores):
+                results.append({"round": round_number + 1, "share": share, **params, "mae": score})
+
+            keep = max(1, len(candidates) // eta) if round_number < rounds - 1 else 1
+            candidates = [candidates[i] for i in np.argsort(scores, kind="stable")[:keep]]
+
+    results = pd.DataFrame(results)
+    best = results[results["round"] == rounds].sort_values("mae").iloc[0]
+    print(f"Best parameters: {candidates[0]} (MAE {best['mae']:.2f})")
+    return candidates[0], results
+
+def save_tuned_params(backend, params, mae):
+    tuned = {}
+    if os.path.exists(tuned_params_file):
+        with open(tuned_params_file) as f:
+            tuned = json.load(f)
+    tuned[backend] = {"params": params, "mae": mae, "tuned": datetime.now().isoformat(timespec="seconds")}
+    os.makedirs(artifact_dir, exist_ok=True)
+    with open(tuned_params_file, "w") as f:
+        json.dump(tuned, f, indent=2)
+
+def load_tuned_params(backend):
+    """
+    Parameters found by the last search for backend, or None if it has never been tuned.
+    """
+    if not os.path.exists(tuned_params_file):
+        return None
+    with open(tuned_params_file) as f:
+        tuned = json.load(f)
+    return tuned.get(backend, {}).get("params")
@@ -1,86 +1,256 @@
-from multiprocessing import Pool
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+import argparse
+import os
+from datetime import datetime
+
 import pandas as pd
-from playwright._impl._errors import TimeoutError
-
-# Function to scrape table data from a page
-def scrape_table_data(page):
-    html = page.inner_html("body")
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("tbody.Crom_body__UYOcU tr")
-    data = [[td.get_text() for td in row.find_all("td")] for row in rows]
-    return data
-
-# Function to scrape data from a specific season
-def scrape_season_data(url, season):
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context()
-        page = context.new_page()
-        page.goto(url, timeout=60000)
-
-        data = []
-        page_number = 1
-
-        while True:
-            try:
-                data += scrape_table_data(page)
-                print(f"Scraped data from page {page_number} of season {season}.")
-
-                next_button = page.query_selector("button[data-track='click'][data-type='controls'][data-pos='next']")
-                if not next_button:
-                    print(f"No next button found. Exiting loop for season {season}.")
-                    break
-
-                next_button.click(timeout=10000)
-                page.wait_for_selector("tbody.Crom_body__UYOcU tr")
-                page_number += 1
-            except TimeoutError as e:
-                print(f"Failed to navigate to the next page of season {season}: {e}")
-                break
-            except Exception as e:
-                print(f"An error occurred for season {season}: {e}")
-                break
-
-        context.close()
-        browser.close()
-        return season, data
-
-# Main function to execute the scraping process with multiprocessing
-def main():
-    urls_seasons = [
-        ("https://www.nba.com/stats/players/boxscores?Season=2023-24&SeasonType=Regular+Season", "2023-24"),
-        ("https://www.nba.com/stats/players/boxscores?Season=2022-23&SeasonType=Regular+Season", "2022-23"),
-        ("https://www.nba.com/stats/players/boxscores?Season=2024-25&SeasonType=Regular+Season", "2024-25")
-    ]
-
-    with Pool(processes=len(urls_seasons)) as pool:
-        results = pool.starmap(scrape_season_data, urls_seasons)
-
-    box_score_col = [
-        "Player", "Team", "Opponent", "Date", "Result", "Minutes", "Points", 
-        "FGM", "FGA", "FG%", "3PM", "3PA", "3P%", "FTM", "FTA", "FT%", 
-        "OREB", "DREB", "REB", "AST", "TO", "STL", "BLK", "PF", "+/-", "SPI"
-    ]
-
-    # Process results and create DataFrames for each season's data
-    dfs = []
-    for season, data in results:
-        df = pd.DataFrame(data, columns=box_score_col)
+
+from Chunk_Writer import ChunkWriter, PageCheckpoint, chunk_extension, read_chunks, restore_integers
+from Scrape_Engine import ScrapeJob, scrape
+from Stats_Api import box_score_endpoint, rows_from_payload, save_fixture, season_fixtures
+
+urls_seasons = [
+    ("https://www.nba.com/stats/players/boxscores?Season=2023-24&SeasonType=Regular+Season", "2023-24"),
+    ("https://www.nba.com/stats/players/boxscores?Season=2022-23&SeasonType=Regular+Season", "2022-23"),
+    ("https://www.nba.com/stats/players/boxscores?Season=2024-25&SeasonType=Regular+Season", "2024-25")
+]
+
+box_score_col = [
+    "Player", "Team", "Opponent", "Date", "Result", "Minutes", "Points",
+    "FGM", "FGA", "FG%", "3PM", "3PA", "3P%", "FTM", "FTA", "FT%",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TO", "PF", "+/-", "SPI"
+]
+
+# The table shows AST, STL, BLK, TOV. Files written before box_score_col followed it label those values
+# AST, TO, STL, BLK: steals under TO, blocks under STL and turnovers under BLK
+swapped_layout = ["AST", "TO", "STL", "BLK"]
+
+# Columns kept as text; the rest are numbers, converted once when the rows are written to disk
+box_score_text_col = ["Player", "Team", "Opponent", "Result"]
+
+# Scraped rows of every finished job, streamed to disk as they arrive. Seasons are scraped in month
+# ranges, one checkpoint each; table pages are also kept one by one while a range is read, so a
+# failed run resumes at the first page or range it did not finish. Completed seasons are kept for
+# good; checkpoints of the current season end on the day they were scraped and are removed once
+# merged into the output.
+checkpoint_dir = "scrape_checkpoints"
+
+def current_season(today=None):
+    # Seasons start in October: 2024-25 runs from October 2024 to the summer of 2025
+    today = today or datetime.now().date()
+    start_year = today.year if today.month >= 10 else today.year - 1
+    return f"{start_year}-{str(start_year + 1)[2:]}"
+
+def season_ranges(season, since=None, today=None):
+    """
+    (start, end) dates (YYYY-MM-DD) of the month ranges season is scraped in, from since (or the
+    start of the season) up to the end of the season or today, whichever comes first.
+    """
+    start_year = int(season[:4])
+    first = pd.Timestamp(since or f"{start_year}-10-01")
+    last = min(pd.Timestamp(f"{start_year + 1}-06-30"), pd.Timestamp(today or datetime.now().date()))
+    months = pd.date_range(first.to_period("M").to_timestamp(), last, freq="MS")
+    return [(f"{max(month, first):%Y-%m-%d}", f"{min(month + pd.offsets.MonthEnd(0), last):%Y-%m-%d}")
+            for month in months]
+
+def checkpoint_path(season, start, end, directory=checkpoint_dir):
+    return os.path.join(directory, f"{season}_{start}_{end}{chunk_extension}")
+
+def season_writer(path):
+    return ChunkWriter(path, box_score_col, text_columns=box_score_text_col, date_columns=["Date"])
+
+def page_checkpoint(path):
+    return PageCheckpoint(path, box_score_col, text_columns=box_score_text_col, date_columns=["Date"])
+
+def fix_swapped_labels(df, suffix=""):
+    """
+    df with the labels of a file in the older swapped layout put back on their values. Tables already
+    in the table's layout come back unchanged, so any file can go through this more than once. suffix
+    is the one a join added to the box score columns another table also has (Usage_Stats.py's "_x").
+    """
+    labels = [col + suffix if col + suffix in df.columns else col for col in swapped_layout]
+    columns = list(df.columns)
+    if labels[0] not in columns:
+        return df
+    start = columns.index(labels[0])
+    if columns[start:start + len(labels)] != labels:
+        return df
+    ast, to, stl, blk = labels
+    return df.rename(columns={to: stl, stl: blk, blk: to})
+
+def read_season(paths):
+    return pd.concat([fix_swapped_labels(read_chunks(path, text_columns=box_score_text_col, date_columns=["Date"]))
+                      for path in paths], ignore_index=True)
+
+def last_scraped_date(output_file, season):
+    """
+    Latest game date of season already in output_file (YYYY-MM-DD), or None.
+    """
+    if not os.path.exists(output_file):
+        return None
+    last = None
+    for chunk in pd.read_csv(output_file, usecols=["Date", "Season"], dtype=str, chunksize=200_000):
+        dates = chunk.loc[chunk["Season"] == season, "Date"]
+        if len(dates):
+            last = max(last or "", dates.max())
+    return last
+
+def with_date_range(url, start, end):
+    # The stats pages take the same DateFrom / DateTo filters as the endpoint behind them
+    return (f"{url}&DateFrom={datetime.strptime(start, '%Y-%m-%d'):%m/%d/%Y}"
+            f"&DateTo={datetime.strptime(end, '%Y-%m-%d'):%m/%d/%Y}")
+
+# Function to read every season, from the JSON the box score page loads or from its rendered table
+def scrape_seasons(mode="api", record_dir=None, replay_dir=None, concurrency=3,
+                   output_file="player_boxscores.csv", full=False):
+    """
+    [(season, paths, since)] for every season in urls_seasons, where paths are the season's month
+    ranges on disk. Completed seasons come from their checkpoints once scraped; the current season
+    is scraped from the last date already in output_file (since; None means the whole season).
+    Every range is checkpointed as soon as it finishes, and in table mode every page as soon as it
+    is read. A failed range keeps its pages, so the next run continues after the last of them; an
+    API range is a single response, so it is simply fetched again.
+    """
+    if mode == "api" and replay_dir:
+        results = []
+        for _, season in urls_seasons:
+            writer = season_writer(os.path.join(replay_dir, "tables", f"{season}{chunk_extension}"))
+            for payload in season_fixtures(replay_dir, season):
+                writer.write(rows_from_payload(payload))
+            print(f"Read {writer.rows} rows of season {season} from the stats API.")
+            results.append((season, [writer.close()], None))
+        return results
+
+    results, jobs, writers = {}, [], {}
+    for url, season in urls_seasons:
+        since = None
+        if season == current_season() and not full:
+            since = last_scraped_date(output_file, season)
+        results[season] = (season, [], since)
+
+        for start, end in season_ranges(season, since):
+            path = checkpoint_path(season, start, end)
+            results[season][1].append(path)
+            if os.path.exists(path):
+                print(f"Season {season} {start} to {end}: using checkpoint {path}.")
+                continue
+
+            # Table pages go to disk one by one as they are read; API payloads are written when they arrive
+            key = f"{season} {start} to {end}"
+            if mode == "api":
+                writers[key] = season_writer(path)
+                jobs.append(ScrapeJob(key, with_date_range(url, start, end), mode="api", endpoint=box_score_endpoint))
+            else:
+                writers[key] = page_checkpoint(path)
+                # All ranges share one headless browser, a context each
+                jobs.append(ScrapeJob(key, with_date_range(url, start, end), mode="table",
+                                      sink=writers[key].write, skip_pages=writers[key].pages))
+
+    scraped = scrape(jobs, concurrency=concurrency, return_exceptions=True) if jobs else {}
+    failed = []
+    for key, result in scraped.items():
+        writer = writers[key]
+        if isinstance(result, Exception):
+            print(f"Scraping {key} failed: {result}")
+            if mode == "api":
+                writer.discard()
+            else:
+                print(f"Kept its first {writer.pages} pages ({writer.rows} rows); the next run continues after them.")
+            failed.append(key)
+            continue
+        if mode == "api":
+            if record_dir:
+                save_fixture(result, record_dir, key.replace(" ", "_"))
+            writer.write(rows_from_payload(result))
+        scraped[key] = None
+        print(f"Read {writer.rows} rows of {key}.")
+        writer.close()
+
+    if failed:
+        raise RuntimeError(f"Scraping failed for {failed}; finished ranges and pages are checkpointed "
+                           f"in {checkpoint_dir}, rerun to resume.")
+    return [results[season] for _, season in urls_seasons]
+
+def earlier_rows(output_file, season, since):
+    # Rows of season already in output_file from before since, read a chunk at a time
+    chunks = [fix_swapped_labels(chunk[(chunk["Season"] == season) & (chunk["Date"] < since)])
+              for chunk in pd.read_csv(output_file, dtype={"Date": str}, chunksize=200_000)]
+    return pd.concat(chunks)
+
+def migrate_box_scores(output_file="player_boxscores.csv"):
+    """
+    Relabel output_file in place if it was written in the older swapped layout: player_boxscores.csv,
+    Team_Box.py's box_scores.csv or Usage_Stats.py's combined table. Scraping does the same for the
+    rows and checkpoints it reads, so this is only needed for files used before the next scrape.
+    Returns whether the file changed.
+    """
+    header = pd.read_csv(output_file, nrows=0)
+    suffix = next((suffix for suffix in ("", "_x")
+                   if not fix_swapped_labels(header, suffix).columns.equals(header.columns)), None)
+    if suffix is None:
+        print(f"{output_file} already has the table's AST, STL, BLK, TO labels.")
+        return False
+
+    tmp_file = output_file + ".tmp"
+    for i, chunk in enumerate(pd.read_csv(output_file, dtype=str, keep_default_na=False, chunksize=200_000)):
+        fix_swapped_labels(chunk, suffix).to_csv(tmp_file, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    os.replace(tmp_file, output_file)
+    print(f"Relabelled STL, BLK and TO in {output_file}. Rebuild what was built from it in full, since its earlier "
+          f"rows carry the swapped totals (for player_boxscores.csv: Preprocessing.py without --incremental).")
+    return True
+
+def scrape_box_scores(mode="api", record_dir=None, replay_dir=None, output_file="player_boxscores.csv",
+                      concurrency=3, full=False):
+    """
+    Scrape every season in urls_seasons into output_file. mode="api" captures the JSON behind the
+    box score page (one response per month range); mode="dom" clicks through the rendered table.
+    record_dir saves the captured responses and replay_dir rebuilds the file from them offline.
+    Unless full is set, only the current season's games from the last date in output_file on are fetched.
+    The output is assembled one season at a time, so memory does not grow with the number of seasons.
+    """
+    results = scrape_seasons(mode, record_dir, replay_dir, concurrency, output_file, full)
+
+    # Seasons cover consecutive date ranges, so writing them in order keeps the file sorted by date
+    tmp_file = output_file + ".tmp"
+    for i, (season, paths, since) in enumerate(sorted(results)):
+        df = read_season(paths)
         df['Season'] = season
-        dfs.append(df)
-
-    # Combine all DataFrames into one and save to a CSV
-    df_combined = pd.concat(dfs)
-    df_combined = df_combined.rename(columns=lambda x: x.strip())
-       
-    # Convert 'Date' column to datetime format
-    df_combined['Date'] = pd.to_datetime(df_combined['Date'])
-    df_combined = df_combined.sort_values(by=['Date', 'Opponent']) 
-    df_combined.to_csv("player_boxscores.csv", index=False)
-    
-    print("Scraping completed. Data saved to player_boxscores.csv")
+        if since:
+            # Keep the rows scraped before since; the games on that date are fetched again in
+            # case the last run saw them before they were final
+            df = df[df['Date'] >= pd.Timestamp(since)]
+            earlier = earlier_rows(output_file, season, since)
+            df = pd.concat([earlier.assign(Date=pd.to_datetime(earlier['Date'])), df])
+
+        df = restore_integers(df).sort_values(by=['Date', 'Opponent'])
+        df.to_csv(tmp_file, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    os.replace(tmp_file, output_file)
+
+    # The current season's rows are in the output now; the next run starts from its new last date
+    for season, paths, since in results:
+        if season == current_season():
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    print(f"Scraping completed. Data saved to {output_file}")
+    return output_file
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape player box scores into player_boxscores.csv.")
+    parser.add_argument("--mode", choices=["api", "dom"], default="api", help="read the stats JSON (api) or click through the table (dom)")
+    parser.add_argument("--record", metavar="DIR", help="save the captured JSON responses to DIR")
+    parser.add_argument("--replay", metavar="DIR", help="build the output from responses recorded in DIR, without a browser")
+    parser.add_argument("--concurrency", type=int, default=3, help="pages open at the same time in the shared browser")
+    parser.add_argument("--full", action="store_true", help="scrape the whole current season again instead of only its new games")
+    parser.add_argument("--migrate", nargs="?", const="player_boxscores.csv", metavar="FILE",
+                        help="only relabel FILE (default: player_boxscores.csv) if written with STL, BLK and TOV under TO, STL and BLK")
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_box_scores(args.migrate)
+        return
+    scrape_box_scores(args.mode, record_dir=args.record, replay_dir=args.replay, concurrency=args.concurrency,
+                      full=args.full)
 
 # Call the main function to start the scraping process
 if __name__ == "__main__":
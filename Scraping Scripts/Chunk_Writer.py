@@ -0,0 +1,150 @@
+import os
+import shutil
+
+import pandas as pd
+
+# pyarrow is optional; without it chunks are appended to a CSV file instead of Parquet row groups
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+chunk_extension = ".parquet" if pa is not None else ".csv"
+
+class ChunkWriter:
+    """
+    Streams scraped rows to disk as they arrive, so a scrape holds at most one chunk in memory.
+    Cells are converted once, at write time: text_columns stay strings, date_columns become dates
+    and every other column is numeric ("-" and blanks become missing). The file only appears under
+    path once close() is called; until then it is written to path + ".partial".
+    """
+
+    def __init__(self, path, columns, text_columns=(), date_columns=(), chunk_rows=5000):
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.columns = list(columns)
+        self.text_columns = set(text_columns)
+        self.date_columns = set(date_columns)
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._pending = []
+        self._writer = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows, columns=self.columns)
+        for col in self.columns:
+            if col in self.date_columns:
+                df[col] = pd.to_datetime(df[col])
+            elif col in self.text_columns:
+                df[col] = df[col].astype("string")
+            else:
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        return df
+
+    def _flush(self):
+        while self._pending:
+            self._write_chunk(self._pending[:self.chunk_rows])
+            self._pending = self._pending[self.chunk_rows:]
+
+    def _write_chunk(self, rows):
+        df = self._frame(rows)
+        if pq is not None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.partial_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.partial_path, mode="a", header=not os.path.exists(self.partial_path), index=False)
+
+    def write(self, rows):
+        """
+        Add rows (sequences of cell values in the order of columns); every chunk_rows are written out.
+        """
+        self._pending.extend(rows)
+        self.rows += len(rows)
+        if len(self._pending) >= self.chunk_rows:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+        elif not os.path.exists(self.partial_path):
+            # No rows at all: still leave an empty table with the right columns
+            empty = self._frame([])
+            if pq is not None:
+                pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), self.partial_path)
+            else:
+                empty.to_csv(self.partial_path, index=False)
+        os.replace(self.partial_path, self.path)
+        return self.path
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+class PageCheckpoint:
+    """
+    Pages of one table scrape, each written to its own file under path + ".pages" as soon as it is
+    read. A failed scrape keeps them, and the next one starts with pages = the number already kept,
+    so it can continue after the last of them. close() merges them into one table at path.
+    """
+
+    def __init__(self, path, columns, text_columns=(), date_columns=()):
+        self.path = path
+        self.page_dir = path + ".pages"
+        self.columns = list(columns)
+        self.text_columns = text_columns
+        self.date_columns = date_columns
+        os.makedirs(self.page_dir, exist_ok=True)
+        self.pages = len(self._page_files())
+        self.rows = sum(len(read_chunks(page)) for page in self._page_files())
+
+    def _page_files(self):
+        return sorted(os.path.join(self.page_dir, name) for name in os.listdir(self.page_dir)
+                      if name.endswith(chunk_extension))
+
+    def write(self, rows):
+        # One finished file per page; ChunkWriter only moves it into place once it is complete
+        writer = ChunkWriter(os.path.join(self.page_dir, f"page_{self.pages + 1:05d}{chunk_extension}"),
+                             self.columns, self.text_columns, self.date_columns)
+        writer.write(rows)
+        writer.close()
+        self.pages += 1
+        self.rows += len(rows)
+
+    def close(self):
+        writer = ChunkWriter(self.path, self.columns, self.text_columns, self.date_columns)
+        for page in self._page_files():
+            df = read_chunks(page, self.text_columns, self.date_columns).astype(object)
+            writer.write(list(df.where(df.notna(), None).itertuples(index=False, name=None)))
+        writer.close()
+        shutil.rmtree(self.page_dir)
+        return self.path
+
+def restore_integers(df):
+    """
+    Numeric columns holding only whole numbers as (nullable) integers, so they are written the way
+    the scraped table shows them: 12 rather than 12.0.
+    """
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col]) and (df[col].dropna() % 1 == 0).all():
+            df[col] = df[col].astype("Int64")
+    return df
+
+def read_chunks(path, text_columns=(), date_columns=()):
+    """
+    A table written by ChunkWriter, with whole-number columns as integers.
+    """
+    if path.endswith(".parquet"):
+        df = pq.read_table(path).to_pandas()
+    else:
+        df = pd.read_csv(path, dtype={col: str for col in text_columns}, parse_dates=list(date_columns))
+    return restore_integers(df)
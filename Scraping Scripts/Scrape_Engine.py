@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+
+from playwright.async_api import TimeoutError, async_playwright
+
+from Table_Extract import extract_rows, table_selector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data"))
+from Instrumentation import stage
+
+# Selectors of the nba.com stats tables
+row_selector = f"{table_selector} tr"
+next_selector = "button[data-track='click'][data-type='controls'][data-pos='next']"
+
+# Nothing the scrapers read comes from these, so contexts do not download them
+blocked_resource_types = {"image", "font", "stylesheet", "media"}
+
+class ScrapeJob:
+    """
+    One page to scrape. mode="table" reads every page of the stats table by clicking "next";
+    mode="api" returns the JSON of the first response whose URL contains endpoint.
+    With a sink (e.g. ChunkWriter.write), table rows are handed to it page by page instead of
+    being collected, and the job returns the number of rows read. skip_pages pages already read
+    by an earlier, failed scrape are paged past without being read again.
+    """
+
+    def __init__(self, key, url, mode="table", endpoint=None, sink=None, skip_pages=0):
+        self.key = key
+        self.url = url
+        self.mode = mode
+        self.endpoint = endpoint
+        self.sink = sink
+        self.skip_pages = skip_pages
+
+async def block_assets(route):
+    if route.request.resource_type in blocked_resource_types:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def next_page(page, timeout):
+    """
+    Click "next" and wait until the table shows different rows. False if there is no next page.
+    """
+    next_button = await page.query_selector(next_selector)
+    if next_button is None or await next_button.is_disabled():
+        return False
+
+    first_row = await page.inner_text(f"{row_selector}:first-child")
+    await next_button.click(timeout=10000)
+    await page.wait_for_function(
+        "([selector, before]) => { const row = document.querySelector(selector);"
+        " return row !== null && row.innerText !== before; }",
+        arg=[f"{row_selector}:first-child", first_row],
+        timeout=timeout,
+    )
+    return True
+
+async def scrape_table(page, url, label, timeout=60000, sink=None, skip_pages=0):
+    await page.goto(url, timeout=timeout)
+    await page.wait_for_selector(row_selector, timeout=timeout)
+
+    data = []
+    rows_read = 0
+    page_number = 1
+    # Continue after the pages an earlier scrape already kept
+    while page_number <= skip_pages:
+        try:
+            if not await next_page(page, timeout):
+                print(f"{label} has no page after {page_number}; all its pages were already read.")
+                return rows_read if sink is not None else data
+        except TimeoutError as e:
+            raise TimeoutError(f"Failed to skip past page {page_number} of {label}: {e}") from e
+        page_number += 1
+    if skip_pages:
+        print(f"Resuming {label} at page {page_number}.")
+
+    while True:
+        with stage("scrape page", profile=False) as record:
+            record.extra.update(job=label, page=page_number)
+            try:
+                rows = await extract_rows(page)
+                record.rows_out = len(rows)
+                rows_read += len(rows)
+                if sink is not None:
+                    sink(rows)
+                else:
+                    data += rows
+                print(f"Scraped data from page {page_number} of {label}.")
+
+                # One click per page, then wait until the table shows different rows
+                if not await next_page(page, timeout):
+                    print(f"No next page for {label}.")
+                    break
+                page_number += 1
+            except TimeoutError as e:
+                # Fail the job rather than return a silently truncated table
+                raise TimeoutError(f"Failed to navigate past page {page_number} of {label} "
+                                   f"({rows_read} rows read): {e}") from e
+    return rows_read if sink is not None else data
+
+async def capture_json(page, url, endpoint, timeout=60000):
+    async with page.expect_response(lambda response: endpoint in response.url and response.ok, timeout=timeout) as info:
+        await page.goto(url, timeout=timeout)
+    response = await info.value
+    return await response.json()
+
+async def run_job(browser, job, semaphore, timeout):
+    # Every job gets its own context (cookies, cache, routes) in the shared browser
+    async with semaphore:
+        context = await browser.new_context()
+        await context.route("**/*", block_assets)
+        page = await context.new_page()
+        try:
+            with stage(f"scrape {job.key}") as record:
+                if job.mode == "api":
+                    return await capture_json(page, job.url, job.endpoint, timeout)
+                result = await scrape_table(page, job.url, job.key, timeout, job.sink, job.skip_pages)
+                record.rows_out = result if job.sink is not None else len(result)
+                return result
+        finally:
+            await context.close()
+
+async def scrape_all(jobs, concurrency=4, headless=True, timeout=60000, return_exceptions=False):
+    """
+    Run the jobs in one headless browser with at most `concurrency` pages open at a time.
+    Returns {job.key: rows or JSON payload}. A failed job raises, or with return_exceptions
+    leaves its exception as the result so the other jobs' results can still be kept.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            results = await asyncio.gather(*(run_job(browser, job, semaphore, timeout) for job in jobs),
+                                           return_exceptions=return_exceptions)
+        finally:
+            await browser.close()
+    return {job.key: result for job, result in zip(jobs, results)}
+
+def scrape(jobs, concurrency=4, headless=True, timeout=60000, return_exceptions=False):
+    """
+    Blocking entry point for the scraping scripts; see scrape_all.
+    """
+    return asyncio.run(scrape_all(jobs, concurrency=concurrency, headless=headless, timeout=timeout,
+                                  return_exceptions=return_exceptions))
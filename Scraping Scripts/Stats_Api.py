@@ -0,0 +1,77 @@
+import glob
+import json
+import os
+
+# The stats pages fill their tables from stats.nba.com JSON endpoints; the player box score page
+# loads the whole season from leaguegamelog in one response and only paginates it client-side.
+# Matched on the path alone, so a local stand-in server can answer it too.
+box_score_endpoint = "/stats/leaguegamelog"
+
+# leaguegamelog fields in the order the box score table displays them, so rows built from the JSON
+# land in the same CSV columns as rows scraped from the DOM: AST, STL, BLK, TOV under box_score_col's
+# AST, STL, BLK, TO.
+box_score_fields = [
+    "PLAYER_NAME", "TEAM_ABBREVIATION", "MATCHUP", "GAME_DATE", "WL", "MIN", "PTS",
+    "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PLUS_MINUS", "FANTASY_PTS"
+]
+
+# The table shows shooting percentages as 45.5 where the JSON has 0.455
+percent_fields = {"FG_PCT", "FG3_PCT", "FT_PCT"}
+
+def result_set(payload, name=None):
+    """
+    (headers, rows) of a stats.nba.com response, from the named result set or the first one.
+    """
+    sets = payload.get("resultSets") or [payload["resultSet"]]
+    if isinstance(sets, dict):
+        sets = [sets]
+    for data in sets:
+        if name is None or data["name"] == name:
+            return data["headers"], data["rowSet"]
+    raise KeyError(f"No result set named {name!r}")
+
+def rows_from_payload(payload, fields=box_score_fields):
+    """
+    Table rows built straight from a JSON payload, one tuple per row in the order of fields.
+    """
+    headers, rows = result_set(payload)
+    positions = [headers.index(field) for field in fields]
+    scaled = [i for i, field in enumerate(fields) if field in percent_fields]
+
+    table = []
+    for row in rows:
+        values = [row[position] for position in positions]
+        for i in scaled:
+            if values[i] is not None:
+                values[i] = round(values[i] * 100, 1)
+        # "2024-10-22T00:00:00" -> "10/22/2024", as the table shows it
+        date = values[3]
+        if isinstance(date, str) and "T" in date:
+            year, month, day = date[:10].split("-")
+            values[3] = f"{month}/{day}/{year}"
+        table.append(tuple(values))
+    return table
+
+def fixture_path(fixtures_dir, season):
+    return os.path.join(fixtures_dir, f"leaguegamelog_{season}.json")
+
+def save_fixture(payload, fixtures_dir, season):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    with open(fixture_path(fixtures_dir, season), "w") as f:
+        json.dump(payload, f)
+
+def load_fixture(fixtures_dir, season):
+    with open(fixture_path(fixtures_dir, season)) as f:
+        return json.load(f)
+
+def season_fixtures(fixtures_dir, season):
+    """
+    Every recorded payload of season: one for the whole season, or one per month range, in date order.
+    """
+    paths = sorted(glob.glob(os.path.join(fixtures_dir, f"leaguegamelog_{season}*.json")))
+    if not paths:
+        raise FileNotFoundError(f"No recorded payload of season {season} in {fixtures_dir}")
+    for path in paths:
+        with open(path) as f:
+            yield json.load(f)
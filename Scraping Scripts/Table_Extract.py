@@ -0,0 +1,40 @@
+from bs4 import BeautifulSoup
+
+# lxml is optional; without it saved pages are parsed with BeautifulSoup instead
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Body of the nba.com stats tables
+table_selector = "tbody.Crom_body__UYOcU"
+
+# Runs in the page: walks the table body and returns only the cell texts, in one round trip
+rows_script = "tbody => Array.from(tbody.rows, row => Array.from(row.cells, cell => cell.textContent))"
+
+async def extract_rows(page, selector=table_selector):
+    """
+    Rows of the table body matching selector on a live page, as tuples of cell texts.
+    """
+    rows = await page.eval_on_selector(selector, rows_script)
+    return [tuple(row) for row in rows]
+
+def _class_xpath(selector):
+    # "tbody.Crom_body__UYOcU" -> //tbody[contains(concat(' ', @class, ' '), ' Crom_body__UYOcU ')]
+    tag, _, class_name = selector.partition(".")
+    if not class_name:
+        return f"//{tag}"
+    return f"//{tag or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+def parse_rows(html, selector=table_selector):
+    """
+    Rows of the table body matching selector in saved page HTML, as tuples of cell texts;
+    the same rows extract_rows reads from the live page.
+    """
+    if lxml is not None:
+        tree = lxml.html.fromstring(html)
+        return [tuple(td.text_content() for td in tr.iterfind("td"))
+                for tbody in tree.xpath(_class_xpath(selector)) for tr in tbody.iterfind("tr")]
+
+    soup = BeautifulSoup(html, "html.parser")
+    return [tuple(td.get_text() for td in row.find_all("td")) for row in soup.select(f"{selector} tr")]
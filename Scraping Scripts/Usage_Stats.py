@@ -1,123 +1,110 @@
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+import os
+import tempfile
 import pandas as pd
-from datetime import datetime
-from playwright._impl._errors import TimeoutError
 
-# Function to scrape table data from a page
-def scrape_table_data(page):
-    html = page.inner_html("body")
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("tbody.Crom_body__UYOcU tr")
-    data = [[td.get_text() for td in row.find_all("td")] for row in rows]
-    return data
+from Box_Scores import box_score_col
+from Chunk_Writer import ChunkWriter, chunk_extension, read_chunks
+from Scrape_Engine import ScrapeJob, scrape
 
-# Function to scrape data from a specific nba.com stat table
-def scrape_season_data(page, url, season):
-    page.goto(url, timeout=60000)
-    data = []
-    page_number = 1
-    while True:
-        try:
-            data += scrape_table_data(page)
-            print(f"Scraped data from page {page_number} of season {season}.")
-            next_button = page.query_selector("button[data-track='click'][data-type='controls'][data-pos='next']")
-            if not next_button:
-                print(f"No next button found for season {season}. Exiting loop.")
-                break
-            next_button.click(timeout=5000)
-            page.wait_for_selector("tbody.Crom_body__UYOcU tr")
-            page_number += 1
-        except TimeoutError as e:
-            print(f"TimeoutError: {e}")
-            break
-        except Exception as e:
-            print(f"An error occurred for season {season}: {e}")
-            break
-    return data
+# Date range of each regular season; a box score's season is the range its date falls in
+season_dates = pd.DataFrame([
+    ("2021-22", "2021-10-19", "2022-04-10"),
+    ("2022-23", "2022-10-18", "2023-04-09"),
+    ("2023-24", "2023-10-24", "2024-04-14"),
+    ("2024-25", "2024-10-22", "2025-04-13"),
+], columns=["Season", "Start", "End"])
 
-# Main function to execute the scraping process
-def main():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context()
-        page = context.new_page()
-        
-        # Scraping box score data for the 2023-24 and 2022-23 seasons
-        url_2023_24 = "https://www.nba.com/stats/players/boxscores?SeasonType=Regular+Season&Season=2023-24"
-        data_2023_24 = scrape_season_data(page, url_2023_24, "2023-24")
+def assign_seasons(dates, date_format="%m/%d/%Y"):
+    """
+    Season of each date string (missing outside every range in season_dates), with the season
+    before it in the table as Prior_Season.
+    """
+    ranges = pd.IntervalIndex.from_arrays(pd.to_datetime(season_dates["Start"]), pd.to_datetime(season_dates["End"]),
+                                          closed="both")
+    # Parse all dates at once, then binary-search each into the sorted season ranges
+    positions = ranges.get_indexer(pd.to_datetime(dates, format=date_format))
+    seasons = season_dates["Season"].reindex(positions).to_numpy()
+    prior = season_dates["Season"].shift(1).reindex(positions).to_numpy()
+    return pd.DataFrame({"Season": seasons, "Prior_Season": prior}, index=dates.index)
 
-        url_2022_23 = "https://www.nba.com/stats/players/boxscores?SeasonType=Regular+Season&Season=2022-23"
-        data_2022_23 = scrape_season_data(page, url_2022_23, "2022-23")
+def season_stats(tables):
+    """
+    Per-season stat tables (season -> DataFrame) as one table indexed by (Player, Season), one row
+    per player and season.
+    """
+    df = pd.concat(tables, names=["Season"]).reset_index(level=0).drop(columns=["Index"], errors="ignore")
+    # A player listed twice in a season's table would duplicate every one of their box scores
+    df = df.drop_duplicates(subset=["Player", "Season"], keep="first")
+    return df.set_index(["Player", "Season"]).sort_index()
 
-        # Scraping traditional player stats for the 2022-23 and 2021-22 seasons
-        url_trad_2022_23 = "https://www.nba.com/stats/players/traditional?Season=2022-23&SeasonType=Regular+Season"
-        trad_data_2022_23 = scrape_season_data(page, url_trad_2022_23, "2022-23")
+def join_season_stats(df_boxscores, stats, suffixes=("_x", "_y")):
+    """
+    Each box score with its player's stats from the season before (left join on the
+    (Player, Prior_Season) key), so the result has exactly one row per box score.
+    """
+    return df_boxscores.join(stats.rename_axis(["Player", "Prior_Season"]), on=["Player", "Prior_Season"],
+                              how="left", lsuffix=suffixes[0], rsuffix=suffixes[1])
 
-        url_trad_2021_22 = "https://www.nba.com/stats/players/traditional?Season=2021-22&SeasonType=Regular+Season"
-        trad_data_2021_22 = scrape_season_data(page, url_trad_2021_22, "2021-22")
-        
-        # Scraping player usage stats for 2022-23 and 2021-2022 seasons
-        url_usage_2022_23 = "https://www.nba.com/stats/players/usage?Season=2022-23&SeasonType=Regular+Season"
-        usage_data_2022_23 = scrape_season_data(page, url_usage_2022_23, "2022-23")
-        
-        url_usage_2021_22 = "https://www.nba.com/stats/players/usage?Season=2021-22&SeasonType=Regular+Season"
-        usage_data_2021_22 = scrape_season_data(page, url_usage_2021_22, "2021-22")
-        
-        browser.close()
+# Main function to execute the scraping process
+def main():
+    # Column names for traditional stats
+    trad_col = [
+        "Index", "Player", "Team", "Age", "GP", "W", "L", "Min", "PTS", "FGM", "FGA", "FG%", 
+        "3PM", "3PA", "3P%", "FTM", "FTA", "FT%", "OREB", "DREB", "REB", "AST", 
+        "TOV", "STL", "BLK", "PF", "FP", "DD2", "TD3", "+/-"
+    ]
+    
+    usage_col = [
+        'Index', 'Player', 'TEAM', 'AGE', 'GP', 'W', 'L', 'MIN', 'USG%', 
+        '%FGM', '%FGA', '%3PM', '%3PA', '%FTM', '%FTA', '%OREB', '%DREB', 
+        '%REB', '%AST', '%TOV', '%STL', '%BLK', '%BLKA', '%PF', '%PFD', '%PTS'
+    ]
 
-        # Combine seasons of data 
-        combined_boxscore_data = data_2023_24 + data_2022_23
-        combined_trad_data_21_23 = trad_data_2022_23 + trad_data_2021_22
-        combined_usage_data_21_23 = usage_data_2021_22 + usage_data_2022_23
-        
-        # Column names for boxscores
-        boxscore_col = [
-            "Player", "Team", "Opponent", "Date", "Result", "Minutes", "Points", 
-            "FGM", "FGA", "FG%", "3PM", "3PA", "3P%", "FTM", "FTA", "FT%", 
-            "OREB", "DREB", "REB", "AST", "TO", "STL", "BLK", "PF", "+/-", "SPI"
-        ]
+    # Columns kept as scraped text; the rest are numbers
+    text_col = ["Player", "Team", "TEAM", "Opponent", "Date", "Result"]
 
-        # Column names for traditional stats
-        trad_col = [
-            "Index", "Player", "Team", "Age", "GP", "W", "L", "Min", "PTS", "FGM", "FGA", "FG%", 
-            "3PM", "3PA", "3P%", "FTM", "FTA", "FT%", "OREB", "DREB", "REB", "AST", 
-            "TOV", "STL", "BLK", "PF", "FP", "DD2", "TD3", "+/-"
-        ]
-        
-        usage_col = [
-            'Index', 'Player', 'TEAM', 'AGE', 'GP', 'W', 'L', 'MIN', 'USG%', 
-            '%FGM', '%FGA', '%3PM', '%3PA', '%FTM', '%FTA', '%OREB', '%DREB', 
-            '%REB', '%AST', '%TOV', '%STL', '%BLK', '%BLKA', '%PF', '%PFD', '%PTS'
-        ]
+    jobs = [
+        # Box score data for the 2023-24 and 2022-23 seasons
+        ("boxscores 2023-24", "https://www.nba.com/stats/players/boxscores?SeasonType=Regular+Season&Season=2023-24", box_score_col),
+        ("boxscores 2022-23", "https://www.nba.com/stats/players/boxscores?SeasonType=Regular+Season&Season=2022-23", box_score_col),
+        # Traditional player stats for the 2022-23 and 2021-22 seasons
+        ("traditional 2022-23", "https://www.nba.com/stats/players/traditional?Season=2022-23&SeasonType=Regular+Season", trad_col),
+        ("traditional 2021-22", "https://www.nba.com/stats/players/traditional?Season=2021-22&SeasonType=Regular+Season", trad_col),
+        # Player usage stats for 2022-23 and 2021-2022 seasons
+        ("usage 2022-23", "https://www.nba.com/stats/players/usage?Season=2022-23&SeasonType=Regular+Season", usage_col),
+        ("usage 2021-22", "https://www.nba.com/stats/players/usage?Season=2021-22&SeasonType=Regular+Season", usage_col),
+    ]
 
-        # Create DataFrames
-        df_boxscores = pd.DataFrame(combined_boxscore_data, columns=boxscore_col)
-        df_traditional_21_23 = pd.DataFrame(combined_trad_data_21_23, columns=trad_col).drop(columns=['Index'])
-        
-        df_usage_21_23 = pd.DataFrame(combined_usage_data_21_23, columns=usage_col).drop(columns=['Index'])
+    with tempfile.TemporaryDirectory() as tmp:
+        # Every table is written to disk page by page as it is scraped instead of kept in memory
+        writers = {
+            key: ChunkWriter(os.path.join(tmp, f"{key.replace(' ', '_')}{chunk_extension}"), columns,
+                             text_columns=[col for col in columns if col in text_col])
+            for key, _, columns in jobs
+        }
 
-        # Function to determine the season of a box score based on the date
-        def determine_season(date_str):
-            game_date = datetime.strptime(date_str, "%m/%d/%Y")
-            if game_date >= datetime(2023, 10, 1):
-                return "2023-24"
-            else:
-                return "2022-23"
+        # All six tables are scraped at the same time, each in its own context of one headless browser
+        scrape([ScrapeJob(key, url, sink=writers[key].write) for key, url, _ in jobs])
+        tables = {key: read_chunks(writer.close(), text_columns=text_col) for key, writer in writers.items()}
 
-        # Add a 'Season' column to boxscore DataFrame
-        df_boxscores['Season'] = df_boxscores['Date'].apply(determine_season)
+    df_boxscores = pd.concat([tables["boxscores 2023-24"], tables["boxscores 2022-23"]], ignore_index=True)
+    # Season of every box score from its date, and the season whose stats it is joined with
+    df_boxscores = pd.concat([df_boxscores, assign_seasons(df_boxscores["Date"])], axis=1)
 
-        # Merge boxscores with appropriate traditional stats
-        df_combined_22_23 = pd.merge(df_boxscores[df_boxscores['Season'] == "2022-23"], df_traditional_21_23, on="Player", how="inner")
-        df_combined_23_24 = pd.merge(df_boxscores[df_boxscores['Season'] == "2023-24"], df_traditional_21_23, on="Player", how="inner")
+    # Traditional and usage stats, each indexed by (Player, Season)
+    df_traditional = season_stats({"2022-23": tables["traditional 2022-23"], "2021-22": tables["traditional 2021-22"]})
+    df_usage = season_stats({"2022-23": tables["usage 2022-23"], "2021-22": tables["usage 2021-22"]})
+    # GP, W and L are in both tables; usage adds the share columns
+    df_usage = df_usage.drop(columns=[col for col in df_usage.columns if col in df_traditional.columns])
 
-        # Combine both merged DataFrames
-        df_final_combined = pd.concat([df_combined_22_23, df_combined_23_24])
+    # Each box score with its player's traditional and usage stats from the prior season
+    df_final_combined = join_season_stats(df_boxscores, df_traditional)
+    df_final_combined = join_season_stats(df_final_combined, df_usage)
 
-        # Save the final combined DataFrame to a CSV file
-        df_final_combined.to_csv("combined_boxscores_and_trad_stats_22-24.csv", index=False)
-        print("Data saved to combined_boxscores_and_trad_stats_22-24.csv.")
+    # Save the final combined DataFrame to a CSV file
+    df_final_combined.to_csv("combined_boxscores_and_trad_stats_22-24.csv", index=False)
+    print("Data saved to combined_boxscores_and_trad_stats_22-24.csv.")
 
 # Call the main function to start the scraping process
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+root = os.path.dirname(os.path.abspath(__file__))
+for folder in ("Data", "Model", "Scraping Scripts"):
+    sys.path.insert(0, os.path.join(root, folder))
+
+from Instrumentation import instrumented_run, profile_modes, run_log_file, stage as measure
+
+# Fingerprints of the last successful run of every stage, kept in the working directory with the data
+cache_file = ".pipeline_cache.json"
+
+class Stage:
+    """
+    One step of the daily pipeline. A stage is skipped when the content of its input files and its
+    parameters hash to the same fingerprint as its last successful run and its outputs are unchanged.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), depends=(), params=None):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.depends = list(depends)
+        self.params = params or {}
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"stage": self.name, "params": self.params}, sort_keys=True, default=str).encode())
+        for path in self.inputs:
+            digest.update(path.encode())
+            digest.update((file_hash(path) or "missing").encode())
+        return digest.hexdigest()
+
+def file_hash(path, block_size=1 << 20):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_cache():
+    if not os.path.exists(cache_file):
+        return {}
+    with open(cache_file) as f:
+        return json.load(f)
+
+def save_cache(cache):
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_file, cache_file)
+
+def is_cached(stage, fingerprint, cache):
+    entry = cache.get(stage.name)
+    if entry is None or entry["fingerprint"] != fingerprint:
+        return False
+    # Outputs that were deleted or edited since the last run have to be rebuilt
+    return all(file_hash(path) == entry["outputs"].get(path) for path in stage.outputs)
+
+def run_pipeline(stages, force=(), skip=(), max_workers=4):
+    """
+    Run the stages in dependency order. Every stage starts as soon as the stages it depends on have
+    finished, so independent branches run concurrently. Returns {stage name: "ran" | "cached" | "skipped"}.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [name for name in stage.depends if name not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages {unknown}")
+
+    cache = load_cache()
+    cache_lock = threading.Lock()
+    status = {}
+
+    def execute(stage):
+        if stage.name in skip:
+            return "skipped"
+        # Inputs are hashed only now, after the stages that write them have finished
+        fingerprint = stage.fingerprint()
+        if stage.name not in force and is_cached(stage, fingerprint, cache):
+            print(f"[{stage.name}] inputs unchanged, using cached outputs.")
+            return "cached"
+
+        start = time.perf_counter()
+        print(f"[{stage.name}] running...")
+        with measure(stage.name):
+            stage.run()
+        outputs = {path: file_hash(path) for path in stage.outputs}
+        with cache_lock:
+            cache[stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": outputs,
+                "finished": datetime.now().isoformat(timespec="seconds"),
+            }
+            save_cache(cache)
+        print(f"[{stage.name}] done in {time.perf_counter() - start:.1f}s.")
+        return "ran"
+
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for stage in [stage for stage in pending if all(name in status for name in stage.depends)]:
+                pending.remove(stage)
+                running[pool.submit(execute, stage)] = stage
+            if not running:
+                raise ValueError(f"Dependency cycle between stages {[stage.name for stage in pending]}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                # Re-raise the first failure; stages already running finish before the pool shuts down
+                status[stage.name] = future.result()
+    return status
+
+def daily_stages(start_date, end_date=None, backend="nusvr", schedule_file="2024-25_schedule.csv", prune_threshold=0.7):
+    """
+    scrape -> preprocess -> rolling features -> feature pruning, and matchups alongside them, feeding predict.
+    The player-level features are built from the same scrape on their own branch.
+    """
+    end_date = end_date or start_date
+    label = start_date if end_date == start_date else f"{start_date}_{end_date}"
+    matchups_file = f"{label}_matchups.csv"
+    predictions_file = f"./Predictions/{label}_predictions.csv"
+
+    def scrape():
+        from Box_Scores import scrape_box_scores
+        scrape_box_scores()
+
+    def preprocess():
+        from Preprocessing import combine_game_stats
+        combine_game_stats("player_boxscores.csv", "game_stats.csv", incremental=True)
+
+    def rolling():
+        # Only the games since the persisted state's last date are added
+        from Rolling_State import refresh_rolling_averages
+        refresh_rolling_averages("rolling_state.json", "game_stats.csv", "rolling_averages.csv")
+
+    def player_features():
+        from Player_Rolling import update_player_features
+        update_player_features("player_boxscores.csv", "player_features.csv")
+
+    def correlation():
+        from Correlation import write_selected_features
+        write_selected_features("rolling_averages.csv", threshold=prune_threshold)
+
+    def matchups():
+        from Daily_Matchups import matchups_between
+        matchups_between(start_date, end_date, schedule_file).to_csv(matchups_file, index=False)
+        print(f"Saved matchups to {matchups_file}")
+
+    def predict():
+        import pandas as pd
+        from model import predict_games
+        predictions_df = predict_games(pd.read_csv(matchups_file), backend=backend)
+        os.makedirs(os.path.dirname(predictions_file), exist_ok=True)
+        predictions_df.to_csv(predictions_file, index=False)
+        print(predictions_df)
+
+    return [
+        # The box score pages cannot be fingerprinted, so scraping reruns once per day
+        Stage("scrape", scrape, outputs=["player_boxscores.csv"],
+              params={"day": datetime.now().strftime("%Y-%m-%d")}),
+        Stage("preprocess", preprocess, inputs=["player_boxscores.csv"], outputs=["game_stats.csv"],
+              depends=["scrape"]),
+        Stage("rolling", rolling, inputs=["game_stats.csv"], outputs=["rolling_averages.csv", "rolling_state.json"],
+              depends=["preprocess"]),
+        Stage("player_features", player_features, inputs=["player_boxscores.csv"], outputs=["player_features.csv"],
+              depends=["scrape"]),
+        Stage("correlation", correlation, inputs=["rolling_averages.csv"], outputs=["selected_features.json"],
+              depends=["rolling"], params={"threshold": prune_threshold}),
+        Stage("matchups", matchups, inputs=[schedule_file], outputs=[matchups_file],
+              params={"start": start_date, "end": end_date}),
+        Stage("predict", predict,
+              # The model pointer too, so a retrained or deleted model invalidates the cached predictions
+              inputs=["rolling_averages.csv", "selected_features.json", matchups_file, "Models/tuned_params.json",
+                      "Models/latest.json"],
+              outputs=[predictions_file], depends=["correlation", "matchups"], params={"backend": backend}),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the daily pipeline, skipping stages whose inputs have not changed.")
+    parser.add_argument("--start", default=datetime.now().strftime("%Y-%m-%d"), help="first date to predict (default: today)")
+    parser.add_argument("--end", help="last date to predict (default: the start date)")
+    parser.add_argument("--backend", default="nusvr", help="regression backend for the predict stage")
+    parser.add_argument("--threshold", type=float, default=0.7, help="correlation above which near-duplicate features are pruned")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="rerun these stages even if cached")
+    parser.add_argument("--skip", nargs="+", default=[], metavar="STAGE", help="do not run these stages (e.g. scrape when offline)")
+    parser.add_argument("--jobs", type=int, default=4, help="stages to run at the same time (1 with --profile tracemalloc)")
+    parser.add_argument("--run-log", default=run_log_file, help="JSON lines file every run's stage timings, memory and row counts are appended to")
+    parser.add_argument("--profile", choices=profile_modes, help="also profile every stage with cProfile or trace its allocations with tracemalloc")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stages = daily_stages(args.start, args.end, args.backend, prune_threshold=args.threshold)
+    # tracemalloc's peak and snapshots cover the whole process, so stages running side by side would
+    # be charged each other's allocations; traced runs take the stages one at a time
+    jobs = args.jobs
+    if args.profile == "tracemalloc" and jobs > 1:
+        print(f"Tracing allocations: running stages one at a time instead of {jobs} at once.")
+        jobs = 1
+    status = {}
+    with instrumented_run(args.run_log, args.profile, status=status, jobs=jobs):
+        status.update(run_pipeline(stages, force=args.force, skip=args.skip, max_workers=jobs))
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{name} {state}" for name, state in status.items()))
+
+if __name__ == "__main__":
+    main()